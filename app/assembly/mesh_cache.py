@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Dict, Tuple
+
+import numpy as np
+
+from app.assembly.mesh_utils import DEFAULT_POLICY, MeshPolicy, shape_to_mesh
+from app.assembly.step_loader import content_key, load_shape_for_member
+from app.data import store
+from app.utils.paths import project_temp_dir
+
+# Bump when the file layout changes; older files are then ignored
+MESH_FORMAT_VERSION = 1
+
+_MAGIC = b"TFMESH\0\0"
+# Array data starts on this boundary
+_ALIGN = 64
+_Q_LEVELS = 65535
+
+_log = logging.getLogger("app.mesh_cache")
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def mesh_cache_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def mesh_cache_path(cache_dir: str, key: str, policy: MeshPolicy) -> str:
+    """File for the tessellation of content ``key`` (see step_loader.content_key) under ``policy``."""
+    name = key if len(key) == 40 else hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, name[:2], f"{name}-{policy.key()}-v{MESH_FORMAT_VERSION}.mesh")
+
+
+def save_mesh(path: str, vertices: np.ndarray, faces: np.ndarray, quantize: bool = False, compress: bool = False) -> None:
+    """Write a mesh as float32 vertices and uint32 faces.
+
+    ``quantize`` stores vertices as uint16 steps across the bounding box
+    (about 1/65535 of its size), ``compress`` deflates both blocks. Either
+    option makes files smaller, at the cost of decoding them on load.
+    """
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+    faces = np.ascontiguousarray(faces, dtype=np.uint32).reshape(-1, 3)
+    header = {"n_vertices": len(vertices), "n_faces": len(faces), "quantized": quantize, "compressed": compress}
+    if quantize and len(vertices):
+        lo = vertices.min(axis=0)
+        span = np.maximum(vertices.max(axis=0) - lo, np.finfo(np.float32).tiny)
+        header["origin"] = lo.tolist()
+        header["step"] = (span / _Q_LEVELS).tolist()
+        vertices = np.rint((vertices - lo) / span * _Q_LEVELS).astype(np.uint16)
+    blocks = [vertices.tobytes(), faces.tobytes()]
+    if compress:
+        blocks = [zlib.compress(b, 6) for b in blocks]
+    header["block_sizes"] = [len(b) for b in blocks]
+    meta = json.dumps(header).encode("utf-8")
+    head = _MAGIC + len(meta).to_bytes(4, "little") + meta
+    head += b"\0" * (-len(head) % _ALIGN)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(head)
+            f.write(blocks[0])
+            f.write(b"\0" * (-len(blocks[0]) % _ALIGN))
+            f.write(blocks[1])
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def load_mesh(path: str) -> Tuple[np.ndarray, np.ndarray] | None:
+    """Read a file written by save_mesh(); None if missing or unreadable.
+
+    The blocks are read into memory rather than memory-mapped: the cache
+    lives on the project share, and an open mapping would keep other
+    clients from replacing or deleting the file.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                return None
+            size = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(size).decode("utf-8"))
+            offset = len(_MAGIC) + 4 + size
+            offset += -offset % _ALIGN
+            nv, nf = int(header["n_vertices"]), int(header["n_faces"])
+            v_size, f_size = header["block_sizes"]
+            f_offset = offset + v_size + (-v_size % _ALIGN)
+            v_dtype = np.uint16 if header["quantized"] else np.float32
+            f.seek(offset)
+            v_raw = f.read(v_size)
+            f.seek(f_offset)
+            f_raw = f.read(f_size)
+        if header["compressed"]:
+            v_raw, f_raw = zlib.decompress(v_raw), zlib.decompress(f_raw)
+        vertices = np.frombuffer(v_raw, dtype=v_dtype).reshape(nv, 3)
+        faces = np.frombuffer(f_raw, dtype=np.uint32).reshape(nf, 3)
+        if header["quantized"]:
+            vertices = (vertices * np.asarray(header["step"], dtype=np.float32) + np.asarray(header["origin"], dtype=np.float32)).astype(np.float32)
+        return vertices, faces
+    except (OSError, ValueError, KeyError, zlib.error):
+        _count("errors")
+        return None
+
+
+def load_member_mesh(project: str, part_base: str, rev_index: int, policy: MeshPolicy = DEFAULT_POLICY, use_processes: bool = False) -> Tuple[np.ndarray, np.ndarray] | None:
+    """Tessellation of a part revision under ``policy``, from ``Temp/mesh`` when it was made before.
+
+    Hits skip OpenCASCADE entirely: neither the STEP nor the BRep file is
+    read. Misses mesh the shape (load_shape_for_member) and store the result.
+    """
+    row = store.get_by_key(project, "revisions.csv", (project, part_base, rev_index))
+    path = (row or {}).get("step_path", "")
+    if not path:
+        return None
+    cache_file = mesh_cache_path(os.path.join(project_temp_dir(project), "mesh"), content_key(path, row.get("sha1", "")), policy)
+    if os.path.exists(cache_file):
+        mesh = load_mesh(cache_file)
+        if mesh is not None:
+            _count("hits")
+            return mesh
+    _count("misses")
+    shape = load_shape_for_member(project, part_base, rev_index, use_processes)
+    if shape is None:
+        return None
+    vertices, faces = shape_to_mesh(shape, policy)
+    if not vertices.size or not faces.size:
+        return None
+    try:
+        save_mesh(cache_file, vertices, faces)
+        _count("writes")
+    except OSError as e:
+        _log.warning("Could not write mesh cache %s: %s", cache_file, e)
+    return vertices.astype(np.float32), faces.astype(np.uint32)
@@ -1,3 +1,8 @@
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict
+
 import numpy as np
 
 try:
@@ -8,6 +13,9 @@ try:
     from OCP.BRepMesh import BRepMesh_IncrementalMesh  # type: ignore
     from OCP.TopLoc import TopLoc_Location  # type: ignore
     from OCP.TopoDS import topods_Face  # type: ignore
+    from OCP.Bnd import Bnd_Box  # type: ignore
+    from OCP.BRepBndLib import BRepBndLib  # type: ignore
+    _bnd_add = BRepBndLib.Add_s
     OCC_OK = True
 except Exception:  # pragma: no cover
     try:
@@ -18,90 +26,256 @@ except Exception:  # pragma: no cover
         from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh  # type: ignore
         from OCC.Core.TopLoc import TopLoc_Location  # type: ignore
         from OCC.Core.TopoDS import topods_Face  # type: ignore
+        from OCC.Core.Bnd import Bnd_Box  # type: ignore
+        try:
+            from OCC.Core.BRepBndLib import brepbndlib_Add as _bnd_add  # type: ignore
+        except ImportError:
+            from OCC.Core.BRepBndLib import brepbndlib  # type: ignore
+            _bnd_add = brepbndlib.Add
         OCC_OK = True
     except Exception:  # pragma: no cover
         OCC_OK = False
 
 
-def _apply_loc(pnt, loc):
+@dataclass(frozen=True)
+class MeshPolicy:
+    """How finely shapes are tessellated.
+
+    ``linear`` is the maximum chordal deviation in model units, or with
+    ``relative`` a fraction of the shape's bounding-box diagonal; ``angular``
+    is the maximum angle (radians) between adjacent facet normals.
+    """
+
+    linear: float = 0.2
+    relative: bool = False
+    angular: float = 0.5
+
+    def key(self) -> str:
+        """Short text form, used in cache file names."""
+        return f"{'r' if self.relative else 'd'}{self.linear:g}-a{self.angular:g}"
+
+    def deflection_for(self, shape) -> float:
+        """Absolute linear deflection for ``shape``."""
+        if not self.relative:
+            return self.linear
+        diagonal = _bbox_diagonal(shape)
+        return self.linear * diagonal if diagonal else self.linear
+
+
+DEFAULT_POLICY = MeshPolicy()
+
+_mesh_locks = [threading.Lock() for _ in range(16)]
+_mesh_stats_lock = threading.Lock()
+_mesh_stats = {"meshed": 0, "reused": 0}
+
+
+def _bbox_diagonal(shape) -> float | None:
+    try:
+        box = Bnd_Box()
+        _bnd_add(shape, box)
+        xmin, ymin, zmin, xmax, ymax, zmax = box.Get()
+        return math.dist((xmin, ymin, zmin), (xmax, ymax, zmax))
+    except Exception:
+        return None
+
+
+def mesh_deflection(shape) -> float | None:
+    """Coarsest deflection among the face triangulations, None if a face has none."""
+    worst = 0.0
+    exp = TopExp_Explorer(shape, TopAbs_FACE)
+    while exp.More():
+        try:
+            tri = BRep_Tool.Triangulation(topods_Face(exp.Current()), TopLoc_Location())
+            if tri is None or (hasattr(tri, 'IsNull') and tri.IsNull()):
+                return None
+            worst = max(worst, float(tri.Deflection()))
+        except Exception:
+            return None
+        exp.Next()
+    return worst
+
+
+def ensure_meshed(shape, policy: MeshPolicy = DEFAULT_POLICY) -> float:
+    """Tessellate ``shape`` unless it already is at least as finely as ``policy`` asks.
+
+    The triangulation is stored on the shape, so a shape shared through the
+    shape cache is meshed once per resolution, and never for uses (contact
+    detection, the OCC viewer) that do not need this stage. Returns the
+    linear deflection asked for.
+    """
+    deflection = policy.deflection_for(shape)
+    try:
+        stripe = hash(shape)
+    except TypeError:
+        stripe = id(shape)
+    with _mesh_locks[stripe % len(_mesh_locks)]:
+        current = mesh_deflection(shape)
+        if current is not None and current <= deflection:
+            key = "reused"
+        else:
+            BRepMesh_IncrementalMesh(shape, deflection, False, policy.angular, True)
+            key = "meshed"
+    with _mesh_stats_lock:
+        _mesh_stats[key] += 1
+    return deflection
+
+
+def mesh_stats() -> Dict[str, int]:
+    with _mesh_stats_lock:
+        return dict(_mesh_stats)
+
+
+def _location_matrix(loc) -> np.ndarray | None:
+    """3x4 matrix of a TopLoc_Location, or None for the identity."""
     try:
+        if loc.IsIdentity():
+            return None
         trsf = loc.Transformation()
-        tp = pnt.Transformed(trsf)
-        return [tp.X(), tp.Y(), tp.Z()]
+        return np.array([[trsf.Value(r, c) for c in range(1, 5)] for r in range(1, 4)], dtype=float)
     except Exception:
-        return [pnt.X(), pnt.Y(), pnt.Z()]
+        return None
 
 
-def shape_to_mesh(shape) -> tuple[np.ndarray, np.ndarray]:
-    if not OCC_OK or shape is None:
-        return np.zeros((0,3), dtype=float), np.zeros((0,3), dtype=int)
+def _triangle_nodes(t) -> tuple:
     try:
-        # Generate tessellation with finer deflection
-        BRepMesh_IncrementalMesh(shape, 0.2)
-        verts = []
-        faces = []
-        exp = TopExp_Explorer(shape, TopAbs_FACE)
-        base_index = 0
-        while exp.More():
-            try:
-                sh = exp.Current()
-            except Exception:
-                exp.Next()
+        return (t.Value(1), t.Value(2), t.Value(3))
+    except Exception:
+        return tuple(t.Get())
+
+
+def _face_triangulations(shape) -> list:
+    """(triangulation, location matrix, node count, triangle count) for each meshed face."""
+    found = []
+    exp = TopExp_Explorer(shape, TopAbs_FACE)
+    while exp.More():
+        try:
+            sh = exp.Current()
+            if sh.IsNull():
                 continue
-            try:
-                if sh.IsNull():
-                    exp.Next(); continue
-            except Exception:
-                pass
-            try:
-                face = topods_Face(sh)
-            except Exception:
-                exp.Next(); continue
+            face = topods_Face(sh)
             loc = face.Location() if hasattr(face, 'Location') else TopLoc_Location()
             try:
                 tri = BRep_Tool.Triangulation(face, TopLoc_Location())
             except Exception:
                 tri = BRep_Tool.Triangulation(face)
-            if tri is None:
-                exp.Next(); continue
-            try:
-                if hasattr(tri, 'IsNull') and tri.IsNull():
-                    exp.Next(); continue
-            except Exception:
-                pass
-            # Grab nodes via Node(i)
-            try:
-                nb_nodes = int(tri.NbNodes())
-            except Exception:
-                nb_nodes = 0
-            for i in range(1, nb_nodes + 1):
-                try:
-                    p = tri.Node(i)
-                    verts.append(_apply_loc(p, loc))
-                except Exception:
-                    continue
-            # Grab triangles via Triangle(i)
+            if tri is None or (hasattr(tri, 'IsNull') and tri.IsNull()):
+                continue
+            n_nodes, n_tris = int(tri.NbNodes()), int(tri.NbTriangles())
+            if n_nodes and n_tris:
+                found.append((tri, _location_matrix(loc), n_nodes, n_tris))
+        except Exception:
+            pass
+        finally:
+            exp.Next()
+    return found
+
+
+def shape_to_mesh(shape, policy: MeshPolicy = DEFAULT_POLICY) -> tuple[np.ndarray, np.ndarray]:
+    """Vertices (N, 3) and triangles (M, 3) of a shape's triangulation.
+
+    The shape is meshed first if needed, see ensure_meshed().
+
+    Each face's nodes and triangles are copied straight into arrays sized
+    for the whole shape, and the face location is applied as one matrix
+    product per face rather than per point.
+    """
+    empty = (np.zeros((0,3), dtype=float), np.zeros((0,3), dtype=int))
+    if not OCC_OK or shape is None:
+        return empty
+    try:
+        ensure_meshed(shape, policy)
+        found = _face_triangulations(shape)
+        verts = np.empty((sum(f[2] for f in found), 3), dtype=float)
+        faces = np.empty((sum(f[3] for f in found), 3), dtype=int)
+        nv = nf = 0
+        for tri, matrix, n_nodes, n_tris in found:
             try:
-                nb_tris = int(tri.NbTriangles())
+                pts = np.fromiter(
+                    (c for i in range(1, n_nodes + 1) for p in (tri.Node(i),) for c in (p.X(), p.Y(), p.Z())),
+                    dtype=float, count=3 * n_nodes,
+                ).reshape(-1, 3)
+                idx = np.fromiter(
+                    (n for i in range(1, n_tris + 1) for n in _triangle_nodes(tri.Triangle(i))),
+                    dtype=int, count=3 * n_tris,
+                ).reshape(-1, 3)
             except Exception:
-                nb_tris = 0
-            for i in range(1, nb_tris + 1):
-                try:
-                    t = tri.Triangle(i)
-                    try:
-                        i1 = t.Value(1); i2 = t.Value(2); i3 = t.Value(3)
-                    except Exception:
-                        try:
-                            i1, i2, i3 = t.Get()
-                        except Exception:
-                            continue
-                    faces.append([base_index + i1 - 1, base_index + i2 - 1, base_index + i3 - 1])
-                except Exception:
-                    continue
-            base_index = len(verts)
-            exp.Next()
-        if not verts or not faces:
-            return np.zeros((0,3), dtype=float), np.zeros((0,3), dtype=int)
-        return np.array(verts, dtype=float), np.array(faces, dtype=int)
+                continue
+            if matrix is not None:
+                pts = pts @ matrix[:, :3].T + matrix[:, 3]
+            verts[nv:nv + n_nodes] = pts
+            # OCC node indices are 1-based and per face
+            faces[nf:nf + n_tris] = idx + (nv - 1)
+            nv += n_nodes
+            nf += n_tris
+        if not nv or not nf:
+            return empty
+        return verts[:nv], faces[:nf]
     except Exception:
-        return np.zeros((0,3), dtype=float), np.zeros((0,3), dtype=int)
+        return empty
+
+
+# Cluster cell sizes of the coarser levels of detail, as fractions of a
+# mesh's bounding-box diagonal, coarsest first
+LOD_CELL_FRACTIONS = (1 / 24, 1 / 96)
+# Meshes with fewer triangles are drawn at full resolution only
+LOD_MIN_FACES = 2000
+# A level is kept only if it has at most this share of the next finer one's triangles
+LOD_MAX_RATIO = 0.6
+
+
+def decimate_mesh(vertices: np.ndarray, faces: np.ndarray, cell: float) -> tuple[np.ndarray, np.ndarray]:
+    """Simplify a mesh by vertex clustering.
+
+    Vertices in the same cube of side ``cell`` are merged into their mean;
+    triangles that collapse, and duplicates, are dropped. Coarse but fast
+    and robust, which suits distant or moving parts.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    if cell <= 0 or not len(vertices) or not len(faces):
+        return vertices.astype(np.float32), faces.astype(np.uint32)
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell).astype(np.int64)
+    dims = tuple(int(d) for d in cells.max(axis=0) + 1)
+    try:
+        keys = np.ravel_multi_index(cells.T, dims)
+        _, cluster = np.unique(keys, return_inverse=True)
+    except ValueError:
+        # Grid too large for one integer key
+        _, cluster = np.unique(cells, axis=0, return_inverse=True)
+    cluster = cluster.reshape(-1)
+    tris = cluster[faces]
+    tris = tris[(tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])]
+    if not len(tris):
+        return np.zeros((0, 3), np.float32), np.zeros((0, 3), np.uint32)
+    _, first = np.unique(np.sort(tris, axis=1), axis=0, return_index=True)
+    tris = tris[np.sort(first)]
+    # Keep only clusters still used by a triangle
+    used, tris = np.unique(tris, return_inverse=True)
+    tris = tris.reshape(-1, 3)
+    counts = np.bincount(cluster, minlength=int(cluster.max()) + 1)[used]
+    merged = np.empty((len(used), 3), dtype=np.float64)
+    for axis in range(3):
+        merged[:, axis] = np.bincount(cluster, weights=vertices[:, axis], minlength=int(cluster.max()) + 1)[used] / counts
+    return merged.astype(np.float32), tris.astype(np.uint32)
+
+
+def mesh_lods(vertices: np.ndarray, faces: np.ndarray, fractions=LOD_CELL_FRACTIONS) -> list:
+    """Coarser versions of a mesh for level-of-detail drawing, coarsest first.
+
+    The full mesh itself is not included. Levels that would not save enough
+    triangles are skipped, so small parts get none.
+    """
+    if len(faces) < LOD_MIN_FACES or not len(vertices):
+        return []
+    v = np.asarray(vertices)
+    diagonal = float(np.linalg.norm(v.max(axis=0) - v.min(axis=0)))
+    if not diagonal:
+        return []
+    lods = []
+    finer = len(faces)
+    for fraction in reversed(fractions):
+        lv, lf = decimate_mesh(v, faces, diagonal * fraction)
+        if len(lf) and len(lf) <= finer * LOD_MAX_RATIO:
+            lods.insert(0, (lv, lf))
+            finer = len(lf)
+    return lods
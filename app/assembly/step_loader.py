@@ -1,9 +1,18 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Tuple
+
 # Try OCP (CadQuery) first, then fallback to pythonocc-core (OCC.Core)
 try:
     from OCP.STEPControl import STEPControl_Reader  # type: ignore
     from OCP.IFSelect import IFSelect_RetDone  # type: ignore
     from OCP.TopoDS import TopoDS_Shape  # type: ignore
-    from OCP.BRepMesh import BRepMesh_IncrementalMesh  # type: ignore
     OCC_AVAILABLE = True
     OCC_FLAVOR = "OCP"
 except Exception:  # pragma: no cover
@@ -11,23 +20,143 @@ except Exception:  # pragma: no cover
         from OCC.Core.STEPControl import STEPControl_Reader  # type: ignore
         from OCC.Core.IFSelect import IFSelect_RetDone  # type: ignore
         from OCC.Core.TopoDS import TopoDS_Shape  # type: ignore
-        from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh  # type: ignore
         OCC_AVAILABLE = True
         OCC_FLAVOR = "pythonocc-core"
     except Exception:  # pragma: no cover
         STEPControl_Reader = None  # type: ignore
         IFSelect_RetDone = None  # type: ignore
         TopoDS_Shape = None  # type: ignore
-        BRepMesh_IncrementalMesh = None  # type: ignore
         OCC_AVAILABLE = False
         OCC_FLAVOR = "none"
 
+# Native BRep (de)serialization for the shape cache; binary where available
+_write_brep = None
+_read_brep = None
+if OCC_FLAVOR == "OCP":
+    try:
+        from OCP.BinTools import BinTools  # type: ignore
+
+        def _write_brep(shape, path):
+            BinTools.Write_s(shape, path)
+
+        def _read_brep(path):
+            shape = TopoDS_Shape()
+            BinTools.Read_s(shape, path)
+            return shape
+    except Exception:  # pragma: no cover
+        try:
+            from OCP.BRepTools import BRepTools  # type: ignore
+            from OCP.BRep import BRep_Builder  # type: ignore
+
+            def _write_brep(shape, path):
+                BRepTools.Write_s(shape, path)
+
+            def _read_brep(path):
+                shape = TopoDS_Shape()
+                BRepTools.Read_s(shape, path, BRep_Builder())
+                return shape
+        except Exception:
+            pass
+elif OCC_FLAVOR == "pythonocc-core":
+    try:
+        from OCC.Core.BinTools import bintools  # type: ignore
+
+        def _write_brep(shape, path):
+            bintools.Write(shape, path)
+
+        def _read_brep(path):
+            shape = TopoDS_Shape()
+            bintools.Read(shape, path)
+            return shape
+    except Exception:  # pragma: no cover
+        try:
+            from OCC.Core.BRepTools import breptools_Write, breptools_Read  # type: ignore
+            from OCC.Core.BRep import BRep_Builder  # type: ignore
+
+            def _write_brep(shape, path):
+                breptools_Write(shape, path)
+
+            def _read_brep(path):
+                shape = TopoDS_Shape()
+                breptools_Read(shape, path, BRep_Builder())
+                return shape
+        except Exception:
+            pass
+
 from app.data import store
+from app.utils.paths import project_temp_dir
 
+# Bump to ignore BRep files written by older versions of this module
+BREP_CACHE_VERSION = 1
+# Budget for shapes kept in memory (estimated, see _estimate_bytes)
+SHAPE_CACHE_MAX_BYTES = 1536 * 1024 * 1024
+# A translated shape takes roughly this multiple of its STEP file size
+_SHAPE_BYTES_PER_STEP_BYTE = 2
+# Child processes translating STEP files in parallel (use_processes=True)
+TRANSLATE_PROCESSES = max(1, (os.cpu_count() or 2) - 1)
 
-def load_step_shape(path: str):
-    if not OCC_AVAILABLE:
+_log = logging.getLogger("app.step_loader")
+_stats_lock = threading.Lock()
+_stats = {"brep_hits": 0, "brep_misses": 0, "brep_writes": 0, "brep_errors": 0, "process_translations": 0, "process_failures": 0}
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+# (project, part_base, rev_index, content key) -> (shape, estimated bytes), least recent first
+_shape_lock = threading.Lock()
+_shapes: "OrderedDict[Tuple[str, str, int, str], Tuple[Any, int]]" = OrderedDict()
+_shape_bytes = 0
+_shape_limit = SHAPE_CACHE_MAX_BYTES
+_shape_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_loading: Dict[Tuple[str, str, int, str], threading.Event] = {}
+# (project, part_base, rev_index) -> number of _shapes entries for it, so
+# member_load_cost() needs no content key (and no stat)
+_held: Dict[Tuple[str, str, int], int] = {}
+
+
+def _occ_version() -> str:
+    try:
+        if OCC_FLAVOR == "pythonocc-core":
+            import OCC  # type: ignore
+            return f"pythonocc-{OCC.VERSION}"
+        if OCC_FLAVOR == "OCP":
+            from importlib import metadata
+            for dist in ("cadquery-ocp", "OCP"):
+                try:
+                    return f"ocp-{metadata.version(dist)}"
+                except metadata.PackageNotFoundError:
+                    continue
+    except Exception:
+        pass
+    return OCC_FLAVOR
+
+
+_OCC_VERSION = _occ_version()
+
+
+def _count(key: str) -> None:
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def brep_cache_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def brep_cache_path(cache_dir: str, path: str, sha1: str = "") -> str | None:
+    """Cache file for the STEP at ``path``; None if the file is gone.
+
+    Keyed by content_key() together with the OCC build (BRep files are not
+    portable across it).
+    """
+    if not os.path.exists(path):
         return None
+    content = hashlib.sha1(content_key(path, sha1).encode("utf-8")).hexdigest()
+    build = hashlib.sha1(f"{_OCC_VERSION}|{BREP_CACHE_VERSION}".encode("utf-8")).hexdigest()[:8]
+    return os.path.join(cache_dir, content[:2], f"{content}-{build}.brep")
+
+
+def _translate(path: str):
     reader = STEPControl_Reader()
     status = reader.ReadFile(path)
     if status != IFSelect_RetDone:
@@ -35,19 +164,235 @@ def load_step_shape(path: str):
     ok = reader.TransferRoots()
     if not ok:
         return None
-    shape = reader.OneShape()
-    # Mesh to ensure triangulation when needed (mesh len is arbitrary here)
-    BRepMesh_IncrementalMesh(shape, 1.0)
+    return reader.OneShape()
+
+
+def _load_cached(cache_file: str):
+    try:
+        shape = _read_brep(cache_file)
+    except Exception:
+        shape = None
+    if shape is None or shape.IsNull():
+        _count("brep_errors")
+        return None
+    return shape
+
+
+def _store_cached(cache_file: str, shape) -> None:
+    tmp = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        _write_brep(shape, tmp)
+        os.replace(tmp, cache_file)
+        _count("brep_writes")
+    except Exception as e:
+        _log.warning("Could not write BRep cache %s: %s", cache_file, e)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _translate_to_file(path: str, cache_file: str) -> bool:
+    """Runs in a child process: translate ``path`` and write it to ``cache_file``."""
+    shape = _translate(path)
+    if shape is None:
+        return False
+    _store_cached(cache_file, shape)
+    return os.path.exists(cache_file)
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: OCC state must not be forked, and it is the only option on Windows
+            _pool = ProcessPoolExecutor(max_workers=TRANSLATE_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_translators() -> None:
+    """Stop the translation processes; they are started again on demand."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _translate_in_process(path: str, cache_file: str) -> bool:
+    global _pool
+    pool = _process_pool()
+    try:
+        ok = pool.submit(_translate_to_file, path, cache_file).result()
+    except BrokenProcessPool:
+        # A child died, most likely OCC crashing on this file; the app lives on
+        _log.warning("STEP translation of %s crashed its worker process", path)
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        ok = False
+    except Exception as e:
+        _log.warning("STEP translation of %s failed: %s", path, e)
+        ok = False
+    _count("process_translations" if ok else "process_failures")
+    return ok
+
+
+def load_step_shape(path: str, cache_dir: str | None = None, sha1: str = "", use_processes: bool = False):
+    """Read a STEP file into a shape.
+
+    The shape is not tessellated; callers that need triangles use
+    app.assembly.mesh_utils.ensure_meshed() with the resolution they need.
+
+    With ``cache_dir`` the translated shape is kept there as a BRep file
+    (see brep_cache_path) and later calls read that instead of translating
+    the STEP file again. With ``use_processes`` as well, the translation
+    itself runs in a pool of TRANSLATE_PROCESSES child processes, which pass
+    the result back as that BRep file; calling this from several threads
+    then translates several files at once.
+    """
+    if not OCC_AVAILABLE:
+        return None
+    cache_file = brep_cache_path(cache_dir, path, sha1) if cache_dir and _write_brep is not None else None
+    if cache_file is not None and os.path.exists(cache_file):
+        shape = _load_cached(cache_file)
+        if shape is not None:
+            _count("brep_hits")
+            return shape
+    if cache_file is not None and use_processes:
+        _count("brep_misses")
+        if not _translate_in_process(path, cache_file):
+            return None
+        return _load_cached(cache_file)
+    shape = _translate(path)
+    if shape is None:
+        return None
+    if cache_file is not None:
+        _count("brep_misses")
+        _store_cached(cache_file, shape)
     return shape
 
 
-def load_shape_for_member(project: str, part_base: str, rev_index: int):
+def shape_cache_stats() -> Dict[str, int]:
+    with _shape_lock:
+        return dict(_shape_stats, entries=len(_shapes), bytes=_shape_bytes, max_bytes=_shape_limit)
+
+
+def set_shape_cache_limit(max_bytes: int) -> None:
+    global _shape_limit
+    with _shape_lock:
+        _shape_limit = max_bytes
+        _evict()
+
+
+def clear_shape_cache(project: str | None = None) -> None:
+    global _shape_bytes
+    with _shape_lock:
+        for key in [k for k in _shapes if project is None or k[0] == project]:
+            _shape_bytes -= _shapes.pop(key)[1]
+            _release(key)
+
+
+def _release(key: Tuple[str, str, int, str]) -> None:
+    # Caller holds _shape_lock and has just removed ``key`` from _shapes
+    rev = key[:3]
+    _held[rev] -= 1
+    if not _held[rev]:
+        del _held[rev]
+
+
+def _evict() -> None:
+    # Caller holds _shape_lock; the newest entry is kept even if over budget
+    global _shape_bytes
+    while _shape_bytes > _shape_limit and len(_shapes) > 1:
+        key, (_, nbytes) = _shapes.popitem(last=False)
+        _shape_bytes -= nbytes
+        _release(key)
+        _shape_stats["evictions"] += 1
+
+
+def _estimate_bytes(path: str) -> int:
+    try:
+        return os.path.getsize(path) * _SHAPE_BYTES_PER_STEP_BYTE
+    except OSError:
+        return 0
+
+
+def content_key(path: str, sha1: str = "") -> str:
+    """Identifies a STEP file's content: its SHA-1 (else its path), size and mtime.
+
+    The recorded SHA-1 alone is not enough: a registered file saved over in
+    place is not hashed again, and must not be served from caches built
+    for its old content.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return sha1 or path
+    return f"{sha1 or os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def member_load_cost(project: str, part_base: str, rev_index: int) -> Tuple[int, int]:
+    """Sort key putting cheap members first: (0 if held in memory else 1, STEP size).
+
+    Uses only the revision row and the in-memory cache, so it is fast
+    enough to order a whole assembly on the GUI thread.
+    """
+    row = store.get_by_key(project, "revisions.csv", (project, part_base, rev_index)) or {}
+    try:
+        size = int(row.get("size_bytes") or 0)
+    except ValueError:
+        size = 0
+    with _shape_lock:
+        held = (project, part_base, int(rev_index)) in _held
+    return (0 if held else 1, size)
+
+
+def load_shape_for_member(project: str, part_base: str, rev_index: int, use_processes: bool = False):
+    """Shape of a part revision, shared by the viewer, previews and contact detection.
+
+    Shapes are kept in an in-memory LRU cache bounded by estimated size
+    (SHAPE_CACHE_MAX_BYTES); misses go through load_step_shape() and its
+    BRep cache, translating in a child process if ``use_processes``.
+    Concurrent requests for the same shape load it once.
+    """
+    global _shape_bytes
     if not OCC_AVAILABLE:
         return None
-    revs = store.read_all(project, "revisions.csv")
-    for r in revs:
-        if r.get("project") == project and r.get("part_base") == part_base and r.get("rev_index") == str(rev_index):
-            path = r.get("step_path", "")
-            if path:
-                return load_step_shape(path)
-    return None
+    row = store.get_by_key(project, "revisions.csv", (project, part_base, rev_index))
+    path = (row or {}).get("step_path", "")
+    if not path:
+        return None
+    sha1 = row.get("sha1", "")
+    key = (project, part_base, int(rev_index), content_key(path, sha1))
+    while True:
+        with _shape_lock:
+            entry = _shapes.get(key)
+            if entry is not None:
+                _shapes.move_to_end(key)
+                _shape_stats["hits"] += 1
+                return entry[0]
+            pending = _loading.get(key)
+            if pending is None:
+                _shape_stats["misses"] += 1
+                _loading[key] = threading.Event()
+                break
+        pending.wait()
+        with _shape_lock:
+            if key not in _shapes:
+                # The other load failed; let the caller see the same result
+                return None
+    try:
+        shape = load_step_shape(path, os.path.join(project_temp_dir(project), "brep"), sha1, use_processes)
+        if shape is not None:
+            nbytes = _estimate_bytes(path)
+            with _shape_lock:
+                _shapes[key] = (shape, nbytes)
+                _shape_bytes += nbytes
+                _held[key[:3]] = _held.get(key[:3], 0) + 1
+                _evict()
+        return shape
+    finally:
+        with _shape_lock:
+            _loading.pop(key).set()
@@ -1,3 +1,5 @@
+import math
+
 from PyQt5 import QtWidgets, QtCore, QtGui
 
 # Try pythonocc-core Qt viewer first
@@ -27,6 +29,31 @@ except Exception:
     gl = None  # type: ignore
     np = None  # type: ignore
 
+from app.assembly.mesh_utils import mesh_lods
+
+# GL fallback level of detail: the camera must rest this long before parts
+# are refined
+LOD_IDLE_MS = 250
+# On-screen diameters (pixels) from which the next finer level is drawn
+LOD_PIXELS = (48, 240)
+# GL fallback parts are packed into shared buffers of at most this many
+# (full-resolution) vertices, one draw call each
+BATCH_MAX_VERTICES = 1_000_000
+
+
+class _MeshBatch:
+    """Parts drawn together by one GLMeshItem.
+
+    ``slots`` holds each vertex's row in the viewer's color palette, so
+    recoloring a part only changes the palette and the batch's color array.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.capacity_used = 0
+        self.item = None
+        self.slots = None
+
 
 class AssemblyViewer(QtWidgets.QWidget):
     def __init__(self, parent=None):
@@ -130,6 +157,23 @@ class AssemblyViewer(QtWidgets.QWidget):
             self._bbox_min = None
             self._bbox_max = None
             self._mode = 'gl'
+            # Parts share GLMeshItems (see _MeshBatch); _name_to_item maps a
+            # part to its batch. Palette rows are RGBA per part.
+            self._batches = []
+            self._dirty_batches = set()
+            self._flush_pending = False
+            self._slot = {}
+            self._base_palette = np.zeros((0, 4), dtype=np.float32)
+            self._palette = self._base_palette.copy()
+            # Per part: levels coarsest first (full mesh last), level drawn, bounding sphere
+            self._lods = {}
+            self._lod_level = {}
+            self._lod_bounds = {}
+            self._camera_moving = False
+            self._lod_timer = QtCore.QTimer(self)
+            self._lod_timer.setSingleShot(True)
+            self._lod_timer.setInterval(LOD_IDLE_MS)
+            self._lod_timer.timeout.connect(self._refine_lods)
             # Orientation axes for GL fallback
             try:
                 print("[Viewer] GL fallback active; adding GLAxisItem for orientation.")
@@ -166,14 +210,24 @@ class AssemblyViewer(QtWidgets.QWidget):
             except Exception:
                 pass
         elif self._mode == 'gl':
-            for item in list(self._name_to_item.values()):
-                self._view.removeItem(item)
+            for batch in self._batches:
+                if batch.item is not None:
+                    self._view.removeItem(batch.item)
+            self._batches = []
+            self._dirty_batches.clear()
+            self._slot.clear()
+            self._base_palette = np.zeros((0, 4), dtype=np.float32)
+            self._palette = self._base_palette.copy()
             self._name_to_item.clear()
             self._name_to_base_color.clear()
             self._palette_index = 0
             self._bbox_min = None
             self._bbox_max = None
             self._did_initial_fit = False
+            self._lods.clear()
+            self._lod_level.clear()
+            self._lod_bounds.clear()
+            self._lod_timer.stop()
 
     # ====== OCCT path ======
     def _enforce_unlit(self):
@@ -336,12 +390,7 @@ class AssemblyViewer(QtWidgets.QWidget):
                     continue
             self._viewer._display.Repaint()
         elif self._mode == 'gl':
-            for n, item in self._name_to_item.items():
-                if n == name_a or n == name_b:
-                    item.setColor((self._highlight_rgb[0], self._highlight_rgb[1], self._highlight_rgb[2], 1.0))
-                else:
-                    base_rgb = self._name_to_base_color.get(n, (0.7, 0.7, 0.7))
-                    item.setColor((base_rgb[0], base_rgb[1], base_rgb[2], 1.0))
+            self._highlight_slots([name_a, name_b])
 
     def highlight_names(self, names: list[str]):
         target = set(names or [])
@@ -360,15 +409,7 @@ class AssemblyViewer(QtWidgets.QWidget):
             except Exception:
                 pass
         elif self._mode == 'gl':
-            for n, item in self._name_to_item.items():
-                try:
-                    if n in target:
-                        item.setColor((self._highlight_rgb[0], self._highlight_rgb[1], self._highlight_rgb[2], 1.0))
-                    else:
-                        base_rgb = self._name_to_base_color.get(n, (0.7, 0.7, 0.7))
-                        item.setColor((base_rgb[0], base_rgb[1], base_rgb[2], 1.0))
-                except Exception:
-                    continue
+            self._highlight_slots(target)
 
     def clear_highlight(self):
         if self._mode == 'occt':
@@ -389,12 +430,7 @@ class AssemblyViewer(QtWidgets.QWidget):
             except Exception:
                 pass
         elif self._mode == 'gl':
-            for name, item in self._name_to_item.items():
-                try:
-                    base_rgb = self._name_to_base_color.get(name, (0.7, 0.7, 0.7))
-                    item.setColor((base_rgb[0], base_rgb[1], base_rgb[2], 1.0))
-                except Exception:
-                    continue
+            self._highlight_slots(())
 
     # ====== GL fallback path ======
     def _accumulate_bounds(self, vertices):
@@ -420,26 +456,143 @@ class AssemblyViewer(QtWidgets.QWidget):
             except Exception:
                 pass
 
-    def add_mesh(self, name: str, vertices, faces, color=(0.7, 0.7, 0.7, 1.0)):
+    def add_mesh(self, name: str, vertices, faces, color=(0.7, 0.7, 0.7, 1.0), lods=None):
+        """Show a part; ``lods`` are its coarser levels (see mesh_lods), made here when None.
+
+        Parts start at their coarsest level and are refined to what their
+        size on screen needs once the camera has been still for a moment.
+        """
         if self._mode != 'gl':
             return
+        if lods is None:
+            lods = mesh_lods(vertices, faces)
         try:
             vertices = vertices.astype('float32', copy=False)
-            faces = faces.astype('int32', copy=False)
+            # uint32 faces (tessellation cache) are used as they are
+            if faces.dtype != 'uint32':
+                faces = faces.astype('int32', copy=False)
         except Exception:
             pass
-        if name in self._name_to_item:
-            self._view.removeItem(self._name_to_item[name])
         base_rgb = self._get_or_assign_base_rgb(name)
-        mesh = gl.GLMeshItem(vertexes=vertices, faces=faces, smooth=False, computeNormals=False, drawEdges=True, edgeColor=(0.0,0.0,0.0,1.0), color=(base_rgb[0], base_rgb[1], base_rgb[2], 1.0))
-        mesh.setGLOptions('opaque')
+        levels = list(lods) + [(vertices, faces)]
+        self._lods[name] = levels
+        self._lod_level[name] = 0
+        lo, hi = vertices.min(axis=0), vertices.max(axis=0)
+        self._lod_bounds[name] = ((lo + hi) * 0.5, float(np.linalg.norm(hi - lo)) * 0.5)
+        batch = self._name_to_item.get(name)
+        if batch is None:
+            self._slot[name] = len(self._base_palette)
+            row = np.array([[base_rgb[0], base_rgb[1], base_rgb[2], 1.0]], dtype=np.float32)
+            self._base_palette = np.vstack([self._base_palette, row])
+            self._palette = np.vstack([self._palette, row])
+            batch = self._batches[-1] if self._batches else None
+            if batch is None or (batch.names and batch.capacity_used + len(vertices) > BATCH_MAX_VERTICES):
+                batch = _MeshBatch()
+                self._batches.append(batch)
+            batch.names.append(name)
+            batch.capacity_used += len(vertices)
+            self._name_to_item[name] = batch
+        self._mark_dirty(batch)
+        self._accumulate_bounds(vertices)
+        # Not restarted, so parts keep refining while a load streams in
+        if len(levels) > 1 and not self._lod_timer.isActive():
+            self._lod_timer.start()
+
+    # ====== GL level of detail ======
+    def _screen_pixels(self, name: str) -> float:
+        """Approximate on-screen diameter of a part, in pixels."""
+        center, radius = self._lod_bounds[name]
         try:
-            mesh.setShader(None)
+            cam = self._view.cameraPosition()
+            dist = float(np.linalg.norm(np.array([cam.x(), cam.y(), cam.z()]) - center))
+            if dist <= radius:
+                return math.inf
+            # pyqtgraph's field of view is horizontal
+            half_fov = math.radians(float(self._view.opts.get('fov', 60))) * 0.5
+            return radius * self._view.width() / (dist * math.tan(half_fov))
         except Exception:
-            pass
-        self._name_to_item[name] = mesh
-        self._view.addItem(mesh)
-        self._accumulate_bounds(vertices)
+            return math.inf
+
+    def _screen_level(self, name: str, pixels: float) -> int:
+        return min(len(self._lods[name]) - 1, sum(pixels >= p for p in LOD_PIXELS))
+
+    def _set_lod(self, name: str, level: int):
+        batch = self._name_to_item.get(name)
+        if batch is None or self._lod_level.get(name) == level:
+            return
+        self._lod_level[name] = level
+        self._mark_dirty(batch)
+
+    def _on_camera_moved(self):
+        """Hold parts below full resolution while the camera moves, then refine."""
+        if not self._lods:
+            return
+        if not self._camera_moving:
+            self._camera_moving = True
+            for name, level in list(self._lod_level.items()):
+                cap = len(self._lods[name]) - 2
+                if cap >= 0 and level > cap:
+                    self._set_lod(name, cap)
+        self._lod_timer.start()
+
+    def _refine_lods(self):
+        """Move every part to its on-screen level; each affected batch is rebuilt once."""
+        self._camera_moving = False
+        for name in list(self._lods):
+            try:
+                self._set_lod(name, self._screen_level(name, self._screen_pixels(name)))
+            except Exception:
+                continue
+
+    # ====== GL batches ======
+    def _mark_dirty(self, batch: _MeshBatch):
+        """Rebuild ``batch`` on the next event-loop turn, once for all changes made until then."""
+        self._dirty_batches.add(id(batch))
+        if not self._flush_pending:
+            self._flush_pending = True
+            QtCore.QTimer.singleShot(0, self._flush_batches)
+
+    def _flush_batches(self):
+        self._flush_pending = False
+        dirty, self._dirty_batches = self._dirty_batches, set()
+        for batch in self._batches:
+            if id(batch) in dirty:
+                try:
+                    self._rebuild_batch(batch)
+                except Exception:
+                    continue
+
+    def _rebuild_batch(self, batch: _MeshBatch):
+        """Pack the batch's parts, each at its current level, into one vertex and index buffer."""
+        parts = [self._lods[n][self._lod_level[n]] for n in batch.names]
+        sizes = np.array([len(v) for v, _ in parts], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        vertices = np.concatenate([v for v, _ in parts]).astype(np.float32, copy=False)
+        faces = np.concatenate([np.asarray(f, dtype=np.uint32) + np.uint32(o) for (_, f), o in zip(parts, offsets)])
+        batch.slots = np.repeat(np.array([self._slot[n] for n in batch.names], dtype=np.int64), sizes)
+        colors = self._palette[batch.slots]
+        if batch.item is None:
+            # Shaded instead of drawn edges: edge lines would cost as much as the faces
+            batch.item = gl.GLMeshItem(vertexes=vertices, faces=faces, vertexColors=colors, smooth=False, drawEdges=False, shader='shaded')
+            batch.item.setGLOptions('opaque')
+            self._view.addItem(batch.item)
+        else:
+            batch.item.setMeshData(vertexes=vertices, faces=faces, vertexColors=colors)
+
+    def _highlight_slots(self, names):
+        """Color ``names`` with the highlight color and every other part with its own."""
+        self._palette = self._base_palette.copy()
+        rows = [self._slot[n] for n in names if n in self._slot]
+        if rows:
+            self._palette[rows, :3] = self._highlight_rgb
+        for batch in self._batches:
+            if batch.item is None or batch.slots is None or id(batch) in self._dirty_batches:
+                continue
+            try:
+                batch.item.opts['meshdata'].setVertexColors(self._palette[batch.slots])
+                batch.item.meshDataChanged()
+            except Exception:
+                continue
 
     def resizeEvent(self, event):
         try:
@@ -598,6 +751,9 @@ class AssemblyViewer(QtWidgets.QWidget):
     def eventFilter(self, obj, event):
         try:
             et = int(getattr(event, 'type', lambda: -1)())
+            if self._mode == 'gl' and (et == int(QtCore.QEvent.Wheel) or (et == int(QtCore.QEvent.MouseMove) and int(event.buttons()))):
+                # Not consumed: pyqtgraph still moves the camera
+                self._on_camera_moved()
             if et == int(QtCore.QEvent.KeyPress):
                 # Forward to our keyPressEvent and consume
                 try:
@@ -1,12 +1,18 @@
 import json
 import os
-from dataclasses import dataclass
-from typing import Dict, List
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Tuple
 
 CONFIG_DIR = os.path.join("C:\\TFApp")
 ADMIN_CONFIG_PATH = os.path.join(CONFIG_DIR, "admin_config.json")
 PROJECTS_REGISTRY_PATH = os.path.join(CONFIG_DIR, "projects.csv")
 
+# The registry is read on every path lookup; its file is re-checked for
+# changes at most this often
+REGISTRY_RECHECK_SECONDS = 2.0
+
 
 @dataclass
 class Project:
@@ -20,7 +26,15 @@ class AppSettings:
     admin_username: str
     admin_password: str
     default_project: str
-    refresh_seconds: int = 3
+    # Fallback check for table changes that file notifications missed
+    poll_seconds: int = 60
+
+
+_registry_lock = threading.RLock()
+_registry: Dict[str, Project] | None = None
+_registry_sig: Tuple[int, int] | None = None
+_registry_checked_at = 0.0
+_registry_version = 0
 
 
 def ensure_config_dir() -> None:
@@ -34,22 +48,23 @@ def load_admin_settings() -> AppSettings:
             "admin_username": "admin",
             "admin_password": "admin",
             "default_project": "TF10",
-            "ui": {"refresh_seconds": 3},
+            "ui": {"poll_seconds": 60},
         }
         with open(ADMIN_CONFIG_PATH, "w", encoding="utf-8") as f:
             json.dump(default, f, indent=2)
     with open(ADMIN_CONFIG_PATH, "r", encoding="utf-8") as f:
         data = json.load(f)
+    ui = data.get("ui", {})
     return AppSettings(
         admin_username=data.get("admin_username", "admin"),
         admin_password=data.get("admin_password", "admin"),
         default_project=data.get("default_project", "TF10"),
-        refresh_seconds=int(data.get("ui", {}).get("refresh_seconds", 3)),
+        # Configs written before the rename still carry "refresh_seconds"
+        poll_seconds=int(ui.get("poll_seconds", ui.get("refresh_seconds", 60))),
     )
 
 
-def load_projects_registry() -> Dict[str, Project]:
-    ensure_config_dir()
+def _read_projects_registry() -> Dict[str, Project]:
     projects: Dict[str, Project] = {}
     if not os.path.exists(PROJECTS_REGISTRY_PATH):
         # Create a starter registry
@@ -68,8 +83,57 @@ def load_projects_registry() -> Dict[str, Project]:
     return projects
 
 
+def _registry_signature() -> Tuple[int, int] | None:
+    try:
+        st = os.stat(PROJECTS_REGISTRY_PATH)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _current_registry(force_check: bool = False) -> Tuple[int, Dict[str, Project]]:
+    """The memoized registry and its version, re-parsed when the file changed.
+
+    The file is stat'ed at most once per REGISTRY_RECHECK_SECONDS unless
+    ``force_check`` is set.
+    """
+    global _registry, _registry_sig, _registry_checked_at, _registry_version
+    now = time.monotonic()
+    with _registry_lock:
+        if _registry is not None and not force_check and now - _registry_checked_at < REGISTRY_RECHECK_SECONDS:
+            return _registry_version, _registry
+        sig = _registry_signature()
+        if _registry is None or sig is None or sig != _registry_sig:
+            ensure_config_dir()
+            _registry = _read_projects_registry()
+            _registry_sig = _registry_signature()
+            _registry_version += 1
+        _registry_checked_at = now
+        return _registry_version, _registry
+
+
+def load_projects_registry() -> Dict[str, Project]:
+    return {code: replace(p) for code, p in _current_registry()[1].items()}
+
+
+def reload_projects() -> Dict[str, Project]:
+    """Re-read the registry now, e.g. right after it was edited."""
+    global _registry
+    with _registry_lock:
+        _registry = None
+    return load_projects_registry()
+
+
+def registry_version() -> int:
+    """Bumped whenever the registry is re-parsed; lets callers cache derived paths."""
+    return _current_registry()[0]
+
+
 def get_project_root(code: str) -> str:
-    registry = load_projects_registry()
+    registry = _current_registry()[1]
+    if code not in registry:
+        # Possibly added since the last check
+        registry = _current_registry(force_check=True)[1]
     if code not in registry:
         raise KeyError(f"Project code not found: {code}")
     root = registry[code].root
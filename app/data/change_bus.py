@@ -0,0 +1,138 @@
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from app.data.sqlite_backend import SQLITE_DB_NAME
+
+# Channel bumped when files below CAD/Parts change (see app.services.artifact_cache)
+ARTIFACTS = "artifacts"
+# Channel bumped when a project's SQLite database appears or changes, so
+# clients still on CSV tables switch over (see app.data.store)
+BACKEND = "backend"
+
+_log = logging.getLogger("app.change_bus")
+_lock = threading.Lock()
+_versions: Dict[Tuple[str, str], int] = {}
+_listeners: List[Callable[[str, Set[str]], None]] = []
+
+
+def version(project_code: str, name: str) -> int:
+    with _lock:
+        return _versions.get((project_code, name), 0)
+
+
+def versions(project_code: str, names: Iterable[str]) -> Tuple[int, ...]:
+    with _lock:
+        return tuple(_versions.get((project_code, n), 0) for n in names)
+
+
+def bump(project_code: str, names: Iterable[str]) -> None:
+    """Record that tables (or other channels) changed and tell the listeners.
+
+    Listeners run on the calling thread, which may be a watcher thread.
+    """
+    names = set(names)
+    if not names:
+        return
+    with _lock:
+        for name in names:
+            _versions[(project_code, name)] = _versions.get((project_code, name), 0) + 1
+        listeners = list(_listeners)
+    for fn in listeners:
+        try:
+            fn(project_code, names)
+        except Exception:
+            _log.exception("Change listener failed")
+
+
+def subscribe(fn: Callable[[str, Set[str]], None]) -> Callable[[], None]:
+    """Call ``fn(project, names)`` on every bump; returns an unsubscribe function."""
+    with _lock:
+        _listeners.append(fn)
+
+    def unsubscribe() -> None:
+        with _lock:
+            if fn in _listeners:
+                _listeners.remove(fn)
+
+    return unsubscribe
+
+
+class _DatabaseEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "DatabaseWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        bump(self.watcher.project, set().union(*(self.watcher.tables_for(p) for p in paths if p)))
+
+
+class DatabaseWatcher:
+    """Bumps table versions for changes in a project's Database folder.
+
+    Picks up writes by other clients (and echoes of this client's own). For
+    shares that drop change notifications, poll() compares file signatures
+    and bumps whatever changed since the previous poll.
+    """
+
+    def __init__(self, project: str, db_dir: str, tables: Iterable[str]):
+        self.project = project
+        self.db_dir = db_dir
+        self.tables = list(tables)
+        self.observer: Observer | None = None
+        self._polled: Dict[str, Tuple[int, int] | None] | None = None
+
+    def tables_for(self, path: str) -> Set[str]:
+        name = os.path.basename(path)
+        if name.startswith(SQLITE_DB_NAME):
+            return set(self.tables) | {BACKEND}
+        if name.endswith(".journal"):
+            name = name[:-len(".journal")]
+        return {name} if name in self.tables else set()
+
+    def start(self):
+        self.stop()
+        if not os.path.isdir(self.db_dir):
+            return
+        self._polled = self._signatures()
+        self.observer = Observer()
+        self.observer.schedule(_DatabaseEventHandler(self), self.db_dir, recursive=False)
+        self.observer.start()
+
+    def stop(self):
+        if self.observer:
+            try:
+                self.observer.stop()
+                self.observer.join(timeout=2)
+            except Exception:
+                pass
+            self.observer = None
+
+    def _signatures(self) -> Dict[str, Tuple[int, int] | None]:
+        sigs: Dict[str, Tuple[int, int] | None] = {}
+        names = [SQLITE_DB_NAME, SQLITE_DB_NAME + "-wal"] + self.tables + [t + ".journal" for t in self.tables]
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.db_dir, name))
+                sigs[name] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                sigs[name] = None
+        return sigs
+
+    def poll(self) -> None:
+        sigs = self._signatures()
+        previous, self._polled = self._polled, sigs
+        if previous is None:
+            return
+        changed: Set[str] = set()
+        for name, sig in sigs.items():
+            if previous.get(name) != sig:
+                changed |= self.tables_for(name)
+        bump(self.project, changed)
@@ -0,0 +1,167 @@
+import json
+import math
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+# Bump when the snapshot file layout changes; older files are then rebuilt
+SNAPSHOT_VERSION = 1
+
+# Columns stored as typed arrays. Every other column is dictionary-encoded:
+# an int32 code per row plus one shared array of its distinct strings.
+COLUMN_TYPES: Dict[str, Dict[str, str]] = {
+    "parts.csv": {"active_rev": "int"},
+    "revisions.csv": {"rev_index": "int", "size_bytes": "int", "pending_activation": "bool"},
+    "revision_history.csv": {"rev_index": "int"},
+    "analyses.csv": {"rev_index": "int"},
+    "assembly_members.csv": {"rev_index": "int", "included": "bool"},
+    "contacts.csv": {"a_rev": "int", "b_rev": "int", "min_gap_mm": "float", "contact_area_mm2": "float"},
+}
+
+
+def to_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def to_bool(value: Any) -> bool:
+    return (value or "").strip().lower() == "true"
+
+
+@dataclass
+class ColumnarTable:
+    """Read-only column-wise snapshot of a table.
+
+    ``columns`` maps each column to a NumPy array with one entry per row:
+    int64/float64/bool values for the typed columns in COLUMN_TYPES, int32
+    codes into ``categories[column]`` for the rest. Strings are interned, so
+    a value repeated across rows or tables is stored once.
+    """
+
+    name: str
+    n_rows: int
+    columns: Dict[str, np.ndarray]
+    categories: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def is_categorical(self, column: str) -> bool:
+        return column in self.categories
+
+    def codes(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def code(self, column: str, value: Any) -> int:
+        """Code of ``value`` in a categorical column, or -1 if it never occurs."""
+        hits = np.flatnonzero(self.categories[column] == ("" if value is None else str(value)))
+        return int(hits[0]) if hits.size else -1
+
+    def values(self, column: str) -> np.ndarray:
+        """Decoded values: typed array, or an object array of strings."""
+        if column in self.categories:
+            return self.categories[column][self.columns[column]]
+        return self.columns[column]
+
+    def mask(self, **criteria: Any) -> np.ndarray:
+        """Boolean row mask for columns equal to ``criteria``."""
+        m = np.ones(self.n_rows, dtype=bool)
+        for column, value in criteria.items():
+            if column in self.categories:
+                m &= self.columns[column] == self.code(column, value)
+            else:
+                m &= self.columns[column] == value
+        return m
+
+
+def from_rows(name: str, headers: List[str], rows: List[Dict[str, Any]]) -> ColumnarTable:
+    types = COLUMN_TYPES.get(name, {})
+    n = len(rows)
+    columns: Dict[str, np.ndarray] = {}
+    categories: Dict[str, np.ndarray] = {}
+    for col in headers:
+        kind = types.get(col)
+        if kind == "int":
+            columns[col] = np.fromiter((to_int(r.get(col)) for r in rows), dtype=np.int64, count=n)
+        elif kind == "float":
+            columns[col] = np.fromiter((to_float(r.get(col)) for r in rows), dtype=np.float64, count=n)
+        elif kind == "bool":
+            columns[col] = np.fromiter((to_bool(r.get(col)) for r in rows), dtype=bool, count=n)
+        else:
+            index: Dict[str, int] = {}
+            columns[col] = np.fromiter(
+                (index.setdefault("" if r.get(col) is None else r.get(col), len(index)) for r in rows),
+                dtype=np.int32,
+                count=n,
+            )
+            cats = np.empty(len(index), dtype=object)
+            cats[:] = [sys.intern(v) for v in index]
+            categories[col] = cats
+    return _freeze(ColumnarTable(name=name, n_rows=n, columns=columns, categories=categories))
+
+
+def _freeze(table: ColumnarTable) -> ColumnarTable:
+    for arr in list(table.columns.values()) + list(table.categories.values()):
+        arr.flags.writeable = False
+    return table
+
+
+def save(path: str, table: ColumnarTable, key: Iterable[Any]) -> None:
+    """Write ``table`` to ``path`` (.npz, no pickling) tagged with ``key``.
+
+    Category strings are stored as one UTF-8 buffer plus end offsets.
+    """
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "key": json.loads(json.dumps(list(key))),
+        "name": table.name,
+        "n_rows": table.n_rows,
+        "columns": list(table.columns),
+    }
+    arrays = {"__meta__": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)}
+    for col, arr in table.columns.items():
+        arrays[f"v:{col}"] = arr
+        if col in table.categories:
+            encoded = [s.encode("utf-8") for s in table.categories[col]]
+            arrays[f"k:{col}"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            arrays[f"o:{col}"] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def load(path: str, key: Iterable[Any]) -> ColumnarTable | None:
+    """Read a snapshot written by save(); None if missing, stale or unreadable."""
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(z["__meta__"].tobytes().decode("utf-8"))
+            if meta.get("version") != SNAPSHOT_VERSION or meta.get("key") != json.loads(json.dumps(list(key))):
+                return None
+            columns: Dict[str, np.ndarray] = {}
+            categories: Dict[str, np.ndarray] = {}
+            for col in meta["columns"]:
+                columns[col] = z[f"v:{col}"]
+                if f"k:{col}" in z.files:
+                    data = z[f"k:{col}"].tobytes()
+                    ends = z[f"o:{col}"].tolist()
+                    starts = [0] + ends[:-1]
+                    cats = np.empty(len(ends), dtype=object)
+                    cats[:] = [sys.intern(data[s:e].decode("utf-8")) for s, e in zip(starts, ends)]
+                    categories[col] = cats
+    except (OSError, ValueError, KeyError):
+        return None
+    return _freeze(ColumnarTable(name=meta["name"], n_rows=int(meta["n_rows"]), columns=columns, categories=categories))
@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+try:
+    import win32api  # type: ignore
+    import win32process  # type: ignore
+except Exception:  # pragma: no cover
+    win32api = None  # type: ignore
+    win32process = None  # type: ignore
+
+# How long a writer waits for a lock before giving up
+DEFAULT_LOCK_TIMEOUT_S = 15.0
+# Locks are held for milliseconds; one older than this (by file mtime) belongs
+# to a client that crashed or lost the share. Kept generous because client
+# and file-server clocks may disagree.
+STALE_LOCK_SECONDS = 120.0
+
+_STILL_ACTIVE = 259
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, float] = {
+    "acquired": 0,
+    "contended": 0,
+    "timeouts": 0,
+    "stale_recovered": 0,
+    "wait_total_s": 0.0,
+    "wait_max_s": 0.0,
+}
+_held = threading.local()
+# Child of the "app" logger set up in app.main
+_log = logging.getLogger("app.locks")
+
+
+class LockTimeout(TimeoutError):
+    """Raised when a lock could not be acquired within its timeout."""
+
+    def __init__(self, path: str, waited_s: float, holder: Dict[str, Any] | None):
+        who = f"{holder.get('user', '?')} on {holder.get('host', '?')}" if holder else "another client"
+        super().__init__(f"{os.path.basename(path)} is locked by {who}; gave up after {waited_s:.1f} s")
+        self.path = path
+        self.waited_s = waited_s
+        self.holder = holder
+
+
+def lock_stats() -> Dict[str, float]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _held_counts() -> Dict[str, int]:
+    counts = getattr(_held, "counts", None)
+    if counts is None:
+        counts = _held.counts = {}
+    return counts
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        if win32api is None:
+            return True
+        try:
+            handle = win32api.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        except Exception as e:
+            # Access denied means the process exists but belongs to someone else
+            return getattr(e, "winerror", None) == 5
+        try:
+            return win32process.GetExitCodeProcess(handle) == _STILL_ACTIVE
+        finally:
+            win32api.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_holder(path: str) -> Dict[str, Any] | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _break_if_stale(path: str, stale_after_s: float) -> bool:
+    """Remove ``path`` if its holder is gone; True when the caller should retry at once."""
+    holder = _read_holder(path)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except FileNotFoundError:
+        return True
+    dead = bool(holder) and holder.get("host") == socket.gethostname() and not _pid_alive(int(holder.get("pid", 0)))
+    if not dead and age < stale_after_s:
+        return False
+    # Move the file aside first so that of several waiters only one breaks it
+    grave = f"{path}.stale-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.rename(path, grave)
+    except OSError:
+        return True
+    if holder is not None and (_read_holder(grave) or {}).get("token") != holder.get("token"):
+        # Raced with a fresh acquisition; hand the lock back to its owner
+        try:
+            os.rename(grave, path)
+        except OSError:
+            pass
+        return True
+    try:
+        os.remove(grave)
+    except OSError:
+        pass
+    with _stats_lock:
+        _stats["stale_recovered"] += 1
+    _log.warning("Removed stale lock %s (holder %s, age %.0f s)", path, holder, age)
+    return True
+
+
+def _acquire(path: str, timeout_s: float, stale_after_s: float) -> str:
+    token = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}:{time.time():.6f}"
+    info = json.dumps({
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "user": os.environ.get("USERNAME") or os.environ.get("USER", ""),
+        "acquired_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "token": token,
+    })
+    start = time.monotonic()
+    delay = 0.01
+    contended = False
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except (FileExistsError, PermissionError):
+            # PermissionError: Windows reports a lock file pending deletion this way
+            contended = True
+            if _break_if_stale(path, stale_after_s):
+                continue
+            waited = time.monotonic() - start
+            if waited >= timeout_s:
+                with _stats_lock:
+                    _stats["timeouts"] += 1
+                holder = _read_holder(path)
+                _log.warning("Timed out after %.1f s waiting for %s (holder %s)", waited, path, holder)
+                raise LockTimeout(path, waited, holder)
+            time.sleep(min(delay * random.uniform(0.5, 1.0), timeout_s - waited))
+            delay = min(delay * 2, 0.25)
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(info)
+        waited = time.monotonic() - start
+        with _stats_lock:
+            _stats["acquired"] += 1
+            _stats["contended"] += int(contended)
+            _stats["wait_total_s"] += waited
+            _stats["wait_max_s"] = max(_stats["wait_max_s"], waited)
+        return token
+
+
+def _release(path: str, token: str) -> None:
+    holder = _read_holder(path)
+    if holder is not None and holder.get("token") != token:
+        _log.warning("Lock %s was taken over while held (now %s)", path, holder)
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def file_lock(path: str, timeout_s: float = DEFAULT_LOCK_TIMEOUT_S, stale_after_s: float = STALE_LOCK_SECONDS) -> Iterator[None]:
+    """Hold the lock file ``path`` for the duration of the block.
+
+    The lock is the file's existence (created with O_EXCL) and records who
+    holds it. Waiters back off up to ``timeout_s`` and then raise LockTimeout;
+    a lock whose holder process is gone, or which is older than
+    ``stale_after_s``, is removed. Re-entrant per thread.
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    counts = _held_counts()
+    if counts.get(key):
+        counts[key] += 1
+        try:
+            yield
+        finally:
+            counts[key] -= 1
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    token = _acquire(path, timeout_s, stale_after_s)
+    counts[key] = 1
+    try:
+        yield
+    finally:
+        counts.pop(key, None)
+        _release(path, token)
@@ -0,0 +1,178 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import win32file  # type: ignore
+except Exception:  # pragma: no cover
+    win32file = None  # type: ignore
+
+# Database file that switches a project from CSV tables to this backend
+SQLITE_DB_NAME = "tfapp.sqlite3"
+
+# Lookup columns beyond the primary keys, mirroring the filters used by the
+# services and views.
+SECONDARY_INDEXES = {
+    "revisions.csv": [("sha1",)],
+    "revision_history.csv": [("project", "part_base", "rev_index")],
+    "analyses.csv": [("analyst",), ("status",)],
+    "analysis_event_notes.csv": [("project", "analysis_id")],
+    "status_history.csv": [("entity", "entity_id")],
+    "contacts.csv": [("project", "assembly_id")],
+}
+
+
+def table_name(name: str) -> str:
+    return os.path.splitext(name)[0]
+
+
+def _q(identifier: str) -> str:
+    # Quote every identifier: status_history has a column called "by"
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def is_network_path(path: str) -> bool:
+    """True for UNC paths and mapped network drives."""
+    path = os.path.abspath(path)
+    if path.startswith("\\\\") or path.startswith("//"):
+        return True
+    if win32file is not None:
+        try:
+            drive = os.path.splitdrive(path)[0] + "\\"
+            return win32file.GetDriveType(drive) == win32file.DRIVE_REMOTE
+        except Exception:
+            return False
+    return False
+
+
+class SqliteBackend:
+    """Project tables stored in one SQLite database.
+
+    Every entry of the CSV schema becomes a table of TEXT columns (rowid keeps
+    insertion order), with indexes on its primary key and on the columns in
+    SECONDARY_INDEXES. Values round-trip as strings, exactly as with CSV.
+
+    WAL mode is used when the database is on a local disk. SQLite's WAL relies
+    on shared memory and is not safe on network shares, so databases on UNC
+    paths or mapped drives use the rollback journal instead.
+    """
+
+    def __init__(self, path: str, headers: Dict[str, List[str]], keys: Dict[str, Tuple[str, ...]], busy_timeout_s: float = 15.0):
+        self.path = path
+        self.headers = headers
+        self.keys = keys
+        self.busy_timeout_s = busy_timeout_s
+        self.journal_mode = "DELETE" if is_network_path(path) else "WAL"
+        self._local = threading.local()
+        self._ensure_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_s, isolation_level=None)
+            conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            conn.execute("PRAGMA synchronous=NORMAL" if self.journal_mode == "WAL" else "PRAGMA synchronous=FULL")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group statements into one atomic write; nested blocks join the outer one."""
+        conn = self._conn()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    def _schema(self) -> List[Tuple[str, str]]:
+        """(object name, CREATE statement) for every table and index."""
+        statements = []
+        for name, cols in self.headers.items():
+            t = table_name(name)
+            statements.append((t, f"CREATE TABLE IF NOT EXISTS {_q(t)} ({', '.join(_q(c) + ' TEXT NOT NULL DEFAULT ' + repr('') for c in cols)})"))
+            index_sets = ([self.keys[name]] if name in self.keys else []) + SECONDARY_INDEXES.get(name, [])
+            for idx_cols in index_sets:
+                idx = f"ix_{t}_{'_'.join(idx_cols)}"
+                statements.append((idx, f"CREATE INDEX IF NOT EXISTS {_q(idx)} ON {_q(t)} ({', '.join(_q(c) for c in idx_cols)})"))
+            if name == "users.csv":
+                statements.append(("ix_users_username_nocase", f"CREATE INDEX IF NOT EXISTS {_q('ix_users_username_nocase')} ON {_q(t)} (username COLLATE NOCASE)"))
+        return statements
+
+    def _ensure_schema(self) -> None:
+        statements = self._schema()
+        existing = {row[0] for row in self._conn().execute("SELECT name FROM sqlite_master")}
+        # Opening an existing database must not take the write lock
+        if all(obj in existing for obj, _ in statements):
+            return
+        with self.transaction() as conn:
+            for _, sql in statements:
+                conn.execute(sql)
+
+    def _select(self, name: str, where: str = "", params: Iterable[Any] = (), limit: int | None = None) -> List[Dict[str, Any]]:
+        cols = self.headers[name]
+        sql = f"SELECT {', '.join(_q(c) for c in cols)} FROM {_q(table_name(name))}"
+        if where:
+            sql += " WHERE " + where
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(zip(cols, values)) for values in self._conn().execute(sql, tuple(params))]
+
+    def read_all(self, name: str) -> List[Dict[str, Any]]:
+        return self._select(name)
+
+    def get_by_key(self, name: str, key: Iterable[Any]) -> Dict[str, Any] | None:
+        columns = self.keys[name]
+        rows = self._select(name, " AND ".join(f"{_q(c)} = ?" for c in columns), [_text(v) for v in key], limit=1)
+        return rows[0] if rows else None
+
+    def find_by(self, name: str, ignore_case: bool = False, **criteria: Any) -> List[Dict[str, Any]]:
+        collate = " COLLATE NOCASE" if ignore_case else ""
+        where = " AND ".join(f"{_q(c)} = ?{collate}" for c in criteria)
+        return self._select(name, where, [_text(v) for v in criteria.values()])
+
+    def append_rows(self, name: str, rows: Iterable[Dict[str, Any]]) -> None:
+        cols = self.headers[name]
+        sql = f"INSERT INTO {_q(table_name(name))} ({', '.join(_q(c) for c in cols)}) VALUES ({', '.join('?' for _ in cols)})"
+        with self.transaction() as conn:
+            conn.executemany(sql, ([_text(row.get(c, "")) for c in cols] for row in rows))
+
+    def write_rows(self, name: str, rows: Iterable[Dict[str, Any]]) -> None:
+        with self.transaction() as conn:
+            conn.execute(f"DELETE FROM {_q(table_name(name))}")
+            self.append_rows(name, rows)
+
+    def update_rows(self, name: str, key: Iterable[Any], changes: Dict[str, Any]) -> int:
+        columns = self.keys[name]
+        sets = ", ".join(f"{_q(c)} = ?" for c in changes)
+        where = " AND ".join(f"{_q(c)} = ?" for c in columns)
+        params = [_text(v) for v in changes.values()] + [_text(v) for v in key]
+        with self.transaction() as conn:
+            return conn.execute(f"UPDATE {_q(table_name(name))} SET {sets} WHERE {where}", params).rowcount
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
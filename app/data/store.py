@@ -1,8 +1,20 @@
 import csv
+import hashlib
+import io
+import itertools
+import json
 import os
-from typing import List, Dict, Any, Iterable
-import portalocker
-from app.utils.paths import project_database_dir
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+import numpy as np
+from app.data import change_bus, columnar
+from app.data.columnar import ColumnarTable
+from app.data.locks import LockTimeout, file_lock, lock_stats
+from app.data.sqlite_backend import SqliteBackend, SQLITE_DB_NAME
+from app.utils.paths import project_database_dir, project_locks_dir, project_temp_dir
 
 CSV_HEADERS = {
     "users.csv": ["username","display_name","email","role","team","manager_username","active"],
@@ -18,57 +30,1051 @@ CSV_HEADERS = {
     "contacts.csv": ["project","assembly_id","a_part","a_rev","b_part","b_rev","relation","min_gap_mm","contact_area_mm2","note"],
 }
 
+# Natural primary key of each table; history tables have none and are only
+# reachable through find_by.
+TABLE_KEYS = {
+    "users.csv": ("username",),
+    "parts.csv": ("project", "part_base"),
+    "revisions.csv": ("project", "part_base", "rev_index"),
+    "analyses.csv": ("project", "analysis_id"),
+    "load_cases.csv": ("project", "analysis_id", "load_case_id"),
+    "assemblies.csv": ("project", "assembly_id"),
+    "assembly_members.csv": ("project", "assembly_id", "part_base", "rev_index"),
+}
+
+# Tables whose CSV only grows through append_row (revisions.csv takes its row
+# updates through the journal and is otherwise only replaced wholesale). They
+# are followed from the last byte offset read instead of being re-parsed from
+# the start on every change.
+APPEND_ONLY_TABLES = {"revisions.csv", "revision_history.csv", "analysis_event_notes.csv", "status_history.csv"}
+
+# Bytes just before the tail offset that must be unchanged for a tail read to
+# be trusted; catches in-place rewrites on shares that report no inode.
+_TAIL_PROBE_BYTES = 64
+
+# update_rows appends JSON delta records to "<table>.journal" next to the CSV;
+# reads fold them in, and the journal is merged back into the CSV (compacted)
+# once it holds this many records.
+JOURNAL_COMPACT_THRESHOLD = 200
+
+# Write-ahead record of the transaction being committed (see transaction()).
+TRANSACTION_JOURNAL_NAME = "_transaction.journal"
+
+# Files written within this many seconds of being parsed are re-parsed on the
+# next read: SMB/FAT timestamps can be as coarse as 2 s, so a same-size rewrite
+# inside that window would otherwise keep the same signature.
+_MTIME_SLACK_SECONDS = 2.0
+
+
+@dataclass
+class _CachedTable:
+    signature: Tuple[int, int, int]
+    rows: List[Dict[str, Any]]
+    fieldnames: List[str] = field(default_factory=list)
+    # Bytes consumed up to the last complete record, and how many rows they hold;
+    # rows past complete_count come from a record still being written.
+    offset: int = 0
+    complete_count: int = 0
+    probe: bytes = b""
+    # Unique per full parse; kept by tail reads, so an equal generation means
+    # the rows up to the older entry's complete_count are unchanged
+    generation: int = 0
+    # (columns, ignore_case) -> key tuple -> row positions, built on first use
+    indexes: Dict[Tuple[Tuple[str, ...], bool], Dict[Tuple[str, ...], List[int]]] = field(default_factory=dict)
+
+    def index(self, columns: Tuple[str, ...], ignore_case: bool = False) -> Dict[Tuple[str, ...], List[int]]:
+        idx = self.indexes.get((columns, ignore_case))
+        if idx is None:
+            idx = {}
+            for pos, row in enumerate(self.rows):
+                idx.setdefault(_index_key(row, columns, ignore_case), []).append(pos)
+            self.indexes[(columns, ignore_case)] = idx
+        return idx
+
+    def inherit_indexes(self, previous: "_CachedTable") -> None:
+        """Reuse ``previous``'s indexes for a table that only grew past it.
+
+        Lists are copied only for keys that gained rows, so readers still
+        holding ``previous`` never see positions beyond its own rows.
+        """
+        if previous.complete_count != len(previous.rows):
+            return
+        start = len(previous.rows)
+        for (columns, ignore_case), old in previous.indexes.items():
+            idx = dict(old)
+            for pos in range(start, len(self.rows)):
+                k = _index_key(self.rows[pos], columns, ignore_case)
+                idx[k] = idx.get(k, []) + [pos]
+            self.indexes[(columns, ignore_case)] = idx
+
+
+@dataclass
+class _Journal:
+    signature: Tuple[int, int, int]
+    records: List[Tuple[Tuple[str, ...], Dict[str, str]]]
+
+
+@dataclass
+class _Transaction:
+    project_code: str
+    # Buffered writes in call order: (kind, table, payload)
+    ops: List[Tuple[str, str, Any]] = field(default_factory=list)
+    # Table locks taken inside the block, held until the commit is done
+    locks: ExitStack = field(default_factory=ExitStack)
+    # Tables to report to the change bus once the block has committed
+    changed: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class PartSummary:
+    """Per-part aggregate of a project's revisions (see part_summary())."""
+
+    parts: List[str]
+    # Highest rev_index of each part (0 if none), and whether any of its
+    # revisions is pending activation
+    latest_rev: np.ndarray
+    pending: np.ndarray
+    positions: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.positions:
+            self.positions = {p: i for i, p in enumerate(self.parts)}
+
+    def get(self, part: str) -> Tuple[int, bool]:
+        pos = self.positions.get(part)
+        return (0, False) if pos is None else (int(self.latest_rev[pos]), bool(self.pending[pos]))
+
+
+@dataclass
+class _PartSummaryState:
+    # Parsed table the summary was folded up to; None when it came from a
+    # columnar snapshot loaded without parsing the CSV
+    generation: int | None
+    signature: Tuple[int, int, int]
+    n_rows: int
+    journal_signature: Tuple[int, int, int] | None
+    # Journal changes by key, to apply to appended rows
+    journal_changes: Dict[Tuple[str, ...], Dict[str, str]]
+    summary: PartSummary
+
+
+_generations = itertools.count(1)
+_cache_lock = threading.RLock()
+_table_cache: Dict[Tuple[str, str], _CachedTable] = {}
+_journal_cache: Dict[Tuple[str, str], _Journal] = {}
+# (project, table) -> (base table, journal signature, base with journal applied)
+_merged_cache: Dict[Tuple[str, str], Tuple[_CachedTable, Tuple[int, int, int], _CachedTable]] = {}
+# (project, table) -> (CSV and journal signatures, snapshot)
+_columnar_cache: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], ColumnarTable]] = {}
+_part_summaries: Dict[str, _PartSummaryState] = {}
+_cache_stats = {"hits": 0, "misses": 0, "tail_reads": 0, "columnar_loads": 0, "columnar_builds": 0, "summary_folds": 0, "summary_builds": 0}
+# project -> SQLite backend, or None while the project still uses CSV files
+_sqlite_backends: Dict[str, SqliteBackend | None] = {}
+_txn_local = threading.local()
+
 
 def _csv_path(project_code: str, name: str) -> str:
     return os.path.join(project_database_dir(project_code), name)
 
 
+def _journal_path(project_code: str, name: str) -> str:
+    return _csv_path(project_code, name) + ".journal"
+
+
+def _table_lock_path(project_code: str, name: str) -> str:
+    return os.path.join(project_locks_dir(project_code), name + ".lock")
+
+
+def _sqlite_path(project_code: str) -> str:
+    return os.path.join(project_database_dir(project_code), SQLITE_DB_NAME)
+
+
+def _sqlite(project_code: str) -> SqliteBackend | None:
+    """The project's SQLite backend if its database exists, else None (CSV)."""
+    with _cache_lock:
+        if project_code in _sqlite_backends:
+            return _sqlite_backends[project_code]
+    path = _sqlite_path(project_code)
+    backend = SqliteBackend(path, CSV_HEADERS, TABLE_KEYS) if os.path.exists(path) else None
+    with _cache_lock:
+        _sqlite_backends[project_code] = backend
+    return backend
+
+
+def _recheck_backend(project_code: str) -> SqliteBackend | None:
+    """Look again for a database created since the project was last checked.
+
+    A backend already in use is kept; each project's backend is created once.
+    """
+    with _cache_lock:
+        backend = _sqlite_backends.get(project_code)
+        if backend is not None:
+            return backend
+        _sqlite_backends.pop(project_code, None)
+    backend = _sqlite(project_code)
+    if backend is not None:
+        invalidate_cache(project_code)
+    return backend
+
+
+def _moved_to_sqlite(project_code: str) -> bool:
+    """Whether a CSV project was migrated while this client waited for a lock.
+
+    import_csv_to_sqlite() holds every table lock until the database is in
+    place, so a writer that checks this after taking a lock never adds CSV
+    rows the migration missed.
+    """
+    return os.path.exists(_sqlite_path(project_code)) and _recheck_backend(project_code) is not None
+
+
+def _on_change(project_code: str, names: Set[str]) -> None:
+    if change_bus.BACKEND in names:
+        _recheck_backend(project_code)
+
+
+change_bus.subscribe(_on_change)
+
+
+def _changed(project_code: str, names: Iterable[str]) -> None:
+    """Report written tables to the change bus (app.data.change_bus).
+
+    Inside a transaction the report waits until the block has committed.
+    """
+    txn = _active_transaction(project_code)
+    if txn is not None:
+        txn.changed.update(names)
+    else:
+        change_bus.bump(project_code, names)
+
+
+def _file_signature(path: str) -> Tuple[int, int, int] | None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _complete_length(data: bytes) -> int:
+    """Length of the prefix of ``data`` that ends on a record boundary.
+
+    A newline only ends a record when it is outside a quoted field, i.e. when
+    the number of quotes before it is even (escaped quotes come in pairs).
+    """
+    end = data.rfind(b"\n")
+    while end >= 0 and data.count(b'"', 0, end) % 2:
+        end = data.rfind(b"\n", 0, end)
+    return end + 1
+
+
+def _parse_records(text: str, fieldnames: List[str] | None) -> Tuple[List[str], List[Dict[str, Any]]]:
+    reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames)
+    rows: List[Dict[str, Any]] = []
+    for row in reader:
+        # Skip completely blank lines
+        if not any((str(v or "").strip() for v in row.values())):
+            continue
+        rows.append(row)
+    return list(reader.fieldnames or []), rows
+
+
+def _parse_csv(path: str, sig: Tuple[int, int, int], previous: _CachedTable | None = None, tail: bool = False) -> _CachedTable:
+    """Parse a table file.
+
+    With ``tail`` set, only the bytes appended after ``previous.offset`` are
+    parsed and added to ``previous``'s rows; if the bytes just before that
+    offset changed, the file was rewritten and is parsed from the start.
+    """
+    start = previous.offset if tail and previous is not None else 0
+    with open(path, "rb") as f:
+        if start and previous.probe:
+            f.seek(start - len(previous.probe))
+            if f.read(len(previous.probe)) != previous.probe:
+                return _parse_csv(path, sig, previous)
+        f.seek(start)
+        data = f.read()
+    complete = _complete_length(data)
+    text = data[:complete].decode("utf-8")
+    if start:
+        fieldnames = previous.fieldnames
+        rows = previous.rows[:previous.complete_count] + _parse_records(text, fieldnames)[1]
+        generation = previous.generation
+    else:
+        fieldnames, rows = _parse_records(text, None)
+        generation = next(_generations)
+    complete_count = len(rows)
+    if complete < len(data):
+        # Trailing record without its newline (hand-edited file or a writer
+        # mid-append): expose it now but parse it again on the next tail read.
+        partial = data[complete:].decode("utf-8", errors="replace")
+        if fieldnames:
+            rows = rows + _parse_records(partial, fieldnames)[1]
+        else:
+            fieldnames, rows = _parse_records(partial, None)
+            complete_count = 0
+            complete = 0
+    probe = (previous.probe if start else b"") + data[:complete]
+    return _CachedTable(
+        signature=sig,
+        rows=rows,
+        fieldnames=fieldnames,
+        offset=start + complete,
+        complete_count=complete_count,
+        probe=probe[-_TAIL_PROBE_BYTES:],
+        generation=generation,
+    )
+
+
+def _index_key(values: Any, columns: Tuple[str, ...], ignore_case: bool) -> Tuple[str, ...]:
+    if isinstance(values, dict):
+        values = [values.get(c) for c in columns]
+    key = tuple("" if v is None else str(v) for v in values)
+    if ignore_case:
+        key = tuple(k.lower() for k in key)
+    return key
+
+
+def invalidate_cache(project_code: str | None = None, name: str | None = None) -> None:
+    """Drop cached tables; with no arguments the whole cache is cleared."""
+    with _cache_lock:
+        for cache in (_table_cache, _journal_cache, _merged_cache, _columnar_cache):
+            for key in list(cache):
+                if (project_code is None or key[0] == project_code) and (name is None or key[1] == name):
+                    del cache[key]
+        if name is None or name == "revisions.csv":
+            for key in list(_part_summaries):
+                if project_code is None or key == project_code:
+                    del _part_summaries[key]
+
+
+def cache_stats() -> Dict[str, int]:
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_table_cache))
+
+
 def seed_tables(project_code: str) -> None:
     os.makedirs(project_database_dir(project_code), exist_ok=True)
+    # Picks up a migration done by another client while this one was not watching
+    if _sqlite(project_code) is not None or (os.path.exists(_sqlite_path(project_code)) and _recheck_backend(project_code) is not None):
+        return
     for name, headers in CSV_HEADERS.items():
         path = _csv_path(project_code, name)
         if not os.path.exists(path):
             with open(path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
                 writer.writerow(headers)
+    if os.path.exists(os.path.join(project_database_dir(project_code), TRANSACTION_JOURNAL_NAME)):
+        with file_lock(_project_lock_path(project_code)):
+            _recover_transaction(project_code)
+
+
+def _load_base(project_code: str, name: str) -> _CachedTable:
+    path = _csv_path(project_code, name)
+    sig = _file_signature(path)
+    if sig is None:
+        raise FileNotFoundError(path)
+    key = (project_code, name)
+    with _cache_lock:
+        entry = _table_cache.get(key)
+        if entry is not None and entry.signature == sig:
+            _cache_stats["hits"] += 1
+            return entry
+    if entry is not None and name in APPEND_ONLY_TABLES and sig[2] == entry.signature[2] and sig[1] >= entry.offset > 0:
+        parsed = _parse_csv(path, sig, entry, tail=True)
+        with _cache_lock:
+            if parsed.generation == entry.generation:
+                parsed.inherit_indexes(entry)
+            _cache_stats["tail_reads" if parsed.generation == entry.generation else "misses"] += 1
+            _table_cache[key] = parsed
+        return parsed
+    with _cache_lock:
+        _cache_stats["misses"] += 1
+    parsed_at = time.time()
+    parsed = _parse_csv(path, sig, entry)
+    with _cache_lock:
+        # Append-only tables are always kept: a same-size rewrite is not
+        # something they see, and a tail read re-checks the probe anyway.
+        if name in APPEND_ONLY_TABLES or sig[0] / 1e9 < parsed_at - _MTIME_SLACK_SECONDS:
+            _table_cache[key] = parsed
+        else:
+            _table_cache.pop(key, None)
+    return parsed
+
+
+def _parse_journal(data: bytes) -> List[Tuple[Tuple[str, ...], Dict[str, str]]]:
+    records = []
+    # Only newline-terminated records: the last line may still be in flight
+    for line in data[:data.rfind(b"\n") + 1].splitlines():
+        try:
+            rec = json.loads(line.decode("utf-8"))
+            records.append((tuple(rec["key"]), dict(rec["changes"])))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return records
+
+
+def _load_journal(project_code: str, name: str) -> _Journal | None:
+    path = _journal_path(project_code, name)
+    sig = _file_signature(path)
+    if sig is None or sig[1] == 0:
+        return None
+    key = (project_code, name)
+    with _cache_lock:
+        journal = _journal_cache.get(key)
+        if journal is not None and journal.signature == sig:
+            return journal
+    with open(path, "rb") as f:
+        journal = _Journal(signature=sig, records=_parse_journal(f.read()))
+    with _cache_lock:
+        _journal_cache[key] = journal
+    return journal
+
+
+def _apply_journal(base: _CachedTable, records: List[Tuple[Tuple[str, ...], Dict[str, str]]], columns: Tuple[str, ...]) -> _CachedTable:
+    rows = list(base.rows)
+    with _cache_lock:
+        idx = base.index(columns)
+        for key, changes in records:
+            for pos in idx.get(key, []):
+                rows[pos] = dict(rows[pos], **changes)
+    return _CachedTable(signature=base.signature, rows=rows, fieldnames=base.fieldnames, generation=base.generation)
+
+
+def _load_table(project_code: str, name: str) -> _CachedTable:
+    """The table as readers see it: the CSV with any journaled updates applied."""
+    base = _load_base(project_code, name)
+    journal = _load_journal(project_code, name) if name in TABLE_KEYS else None
+    if journal is None:
+        return base
+    key = (project_code, name)
+    with _cache_lock:
+        cached = _merged_cache.get(key)
+        if cached is not None and cached[0] is base and cached[1] == journal.signature:
+            return cached[2]
+    merged = _apply_journal(base, journal.records, TABLE_KEYS[name])
+    with _cache_lock:
+        _merged_cache[key] = (base, journal.signature, merged)
+    return merged
 
 
 def read_all(project_code: str, name: str) -> List[Dict[str, Any]]:
+    """Return all rows of a table.
+
+    Parsed tables are cached per (project, table) and revalidated against the
+    file's mtime/size/inode, so unchanged files are never re-parsed. Callers get
+    fresh dict copies and may mutate them freely.
+    """
+    db = _sqlite(project_code)
+    if db is not None:
+        return db.read_all(name)
+    return [dict(r) for r in _load_table(project_code, name).rows]
+
+
+def _columnar_path(project_code: str, name: str) -> str:
+    return os.path.join(project_temp_dir(project_code), "columnar", name + ".npz")
+
+
+def read_columnar(project_code: str, name: str) -> ColumnarTable:
+    """Return a typed, column-wise snapshot of a table (see app.data.columnar).
+
+    Journaled updates are included. Snapshots are kept in memory and written
+    to ``Temp/columnar/<table>.npz`` in the project folder, tagged with the
+    CSV and journal signatures, so an unchanged table is loaded without
+    parsing the CSV, even on a fresh start. With SQLite storage the snapshot
+    is built from the database on every call.
+    """
+    db = _sqlite(project_code)
+    if db is not None:
+        return columnar.from_rows(name, CSV_HEADERS[name], db.read_all(name))
     path = _csv_path(project_code, name)
-    if not os.path.exists(path):
+    sig = _file_signature(path)
+    if sig is None:
         raise FileNotFoundError(path)
-    with open(path, "r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows: List[Dict[str, Any]] = []
-        for row in reader:
-            # Skip completely blank lines
-            if not any((str(v or "").strip() for v in row.values())):
-                continue
-            rows.append(row)
-        return rows
+    journal_sig = _file_signature(_journal_path(project_code, name))
+    key = (sig, journal_sig if journal_sig is not None and journal_sig[1] else None)
+    cache_key = (project_code, name)
+    with _cache_lock:
+        cached = _columnar_cache.get(cache_key)
+        if cached is not None and cached[0] == key:
+            _cache_stats["hits"] += 1
+            return cached[1]
+    snapshot_path = _columnar_path(project_code, name)
+    snapshot = columnar.load(snapshot_path, key)
+    if snapshot is not None:
+        with _cache_lock:
+            _cache_stats["columnar_loads"] += 1
+            _columnar_cache[cache_key] = (key, snapshot)
+        return snapshot
+    built_at = time.time()
+    snapshot = columnar.from_rows(name, CSV_HEADERS[name], _load_table(project_code, name).rows)
+    with _cache_lock:
+        _cache_stats["columnar_builds"] += 1
+    # Same racy-timestamp rule as the row cache: files that may still change
+    # without changing their signature are not cached.
+    if max(s[0] for s in key if s is not None) / 1e9 < built_at - _MTIME_SLACK_SECONDS:
+        with _cache_lock:
+            _columnar_cache[cache_key] = (key, snapshot)
+        try:
+            columnar.save(snapshot_path, snapshot, key)
+        except OSError:
+            pass
+    return snapshot
+
+
+_SUMMARY_COLUMNS = ["project", "part_base", "rev_index", "pending_activation"]
+
+
+def _summarize_parts(project_code: str, cols: ColumnarTable) -> PartSummary:
+    sel = cols.mask(project=project_code)
+    # Map part_base codes to stripped names; blank names map to -1 and drop out
+    positions: Dict[str, int] = {}
+    code_pos = np.array([positions.setdefault(n.strip(), len(positions)) if n.strip() else -1 for n in cols.categories["part_base"]], dtype=np.int64)
+    parts = list(positions)
+    pos = code_pos[cols.codes("part_base")[sel]]
+    keep = pos >= 0
+    pos = pos[keep]
+    latest = np.zeros(len(parts), dtype=np.int64)
+    np.maximum.at(latest, pos, cols.columns["rev_index"][sel][keep])
+    pending = np.bincount(pos, weights=cols.columns["pending_activation"][sel][keep], minlength=len(parts)) > 0
+    # Categories of other projects' parts may have left unused slots
+    used = np.bincount(pos, minlength=len(parts)) > 0
+    if not used.all():
+        parts = [p for p, u in zip(parts, used) if u]
+        latest, pending = latest[used], pending[used]
+        positions = {}
+    return PartSummary(parts=parts, latest_rev=latest, pending=pending, positions=positions)
+
+
+def _fold_parts(project_code: str, summary: PartSummary, rows: List[Dict[str, Any]]) -> PartSummary:
+    """``summary`` extended with appended revision ``rows``."""
+    parts = list(summary.parts)
+    positions = dict(summary.positions)
+    latest = summary.latest_rev.tolist()
+    pending = summary.pending.tolist()
+    for r in rows:
+        part = (r.get("part_base") or "").strip()
+        if r.get("project") != project_code or not part:
+            continue
+        pos = positions.get(part)
+        if pos is None:
+            pos = positions[part] = len(parts)
+            parts.append(part)
+            latest.append(0)
+            pending.append(False)
+        latest[pos] = max(latest[pos], columnar.to_int(r.get("rev_index")))
+        pending[pos] = pending[pos] or columnar.to_bool(r.get("pending_activation"))
+    return PartSummary(parts=parts, latest_rev=np.array(latest, dtype=np.int64), pending=np.array(pending, dtype=bool), positions=positions)
+
+
+def part_summary(project_code: str) -> PartSummary:
+    """Latest revision and pending-activation flag of every part of a project.
+
+    Computed with vectorized group-bys over the columnar snapshot of
+    revisions.csv (read_columnar(), so a fresh start reads Temp/columnar
+    instead of parsing the CSV) and then kept up to date incrementally:
+    while the table is only appended to (and its journal is unchanged),
+    only the new rows are folded in. Any other change, such as an
+    activation, recomputes it.
+    """
+    name = "revisions.csv"
+    db = _sqlite(project_code)
+    if db is not None:
+        return _summarize_parts(project_code, columnar.from_rows(name, _SUMMARY_COLUMNS, db.find_by(name, project=project_code)))
+    sig = _file_signature(_csv_path(project_code, name))
+    journal = _load_journal(project_code, name)
+    journal_sig = journal.signature if journal is not None else None
+    with _cache_lock:
+        state = _part_summaries.get(project_code)
+    if state is not None and state.signature == sig and state.journal_signature == journal_sig:
+        return state.summary
+    base = None
+    if state is not None and state.generation is not None and state.journal_signature == journal_sig:
+        base = _load_base(project_code, name)
+    if base is not None and state.generation == base.generation and state.n_rows <= len(base.rows):
+        columns = TABLE_KEYS[name]
+        appended = []
+        for row in base.rows[state.n_rows:]:
+            changes = state.journal_changes.get(_index_key(row, columns, False))
+            appended.append(dict(row, **changes) if changes else row)
+        summary = _fold_parts(project_code, state.summary, appended)
+        journal_changes = state.journal_changes
+        generation, n_rows, complete = base.generation, len(base.rows), base.complete_count == len(base.rows)
+        sig = base.signature
+        with _cache_lock:
+            _cache_stats["summary_folds"] += 1
+    else:
+        snapshot = read_columnar(project_code, name)
+        summary = _summarize_parts(project_code, snapshot)
+        journal_changes = {}
+        for key, changes in (journal.records if journal is not None else []):
+            journal_changes[key] = dict(journal_changes.get(key, {}), **changes)
+        # Later appends are folded onto the parsed table the snapshot was
+        # built from, if it was built rather than loaded from disk
+        with _cache_lock:
+            entry = _table_cache.get((project_code, name))
+            _cache_stats["summary_builds"] += 1
+        if entry is not None and entry.signature == sig and len(entry.rows) == snapshot.n_rows:
+            generation, complete = entry.generation, entry.complete_count == len(entry.rows)
+        else:
+            generation, complete = None, True
+        n_rows = snapshot.n_rows
+    with _cache_lock:
+        if complete and sig is not None:
+            _part_summaries[project_code] = _PartSummaryState(generation, sig, n_rows, journal_sig, journal_changes, summary)
+        else:
+            # A half-written last row is parsed again later; do not build on it
+            _part_summaries.pop(project_code, None)
+    return summary
+
+
+def get_by_key(project_code: str, name: str, key: Iterable[Any]) -> Dict[str, Any] | None:
+    """Look up one row by the table's primary key (see TABLE_KEYS).
+
+    Values are compared as strings, so ``rev_index`` may be passed as an int.
+    Returns a copy of the first matching row, or None.
+    """
+    db = _sqlite(project_code)
+    if db is not None:
+        return db.get_by_key(name, key)
+    columns = TABLE_KEYS[name]
+    table = _load_table(project_code, name)
+    with _cache_lock:
+        hits = table.index(columns).get(_index_key(tuple(key), columns, False))
+        return dict(table.rows[hits[0]]) if hits else None
+
+
+def find_by(project_code: str, name: str, ignore_case: bool = False, **criteria: Any) -> List[Dict[str, Any]]:
+    """Return copies of all rows whose columns equal ``criteria``.
+
+    An index on the requested column set is built once per table version and
+    reused until the file changes.
+    """
+    db = _sqlite(project_code)
+    if db is not None:
+        return db.find_by(name, ignore_case, **criteria)
+    columns = tuple(sorted(criteria))
+    table = _load_table(project_code, name)
+    with _cache_lock:
+        hits = table.index(columns, ignore_case).get(_index_key(criteria, columns, ignore_case), [])
+        return [dict(table.rows[pos]) for pos in hits]
 
 
 def append_row(project_code: str, name: str, row: Dict[str, Any]) -> None:
-    path = _csv_path(project_code, name)
-    headers = CSV_HEADERS[name]
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "a", newline="", encoding="utf-8") as f:
-        portalocker.lock(f, portalocker.LOCK_EX)
-        writer = csv.DictWriter(f, fieldnames=headers)
-        if f.tell() == 0:
-            writer.writeheader()
-        writer.writerow({k: row.get(k, "") for k in headers})
+    append_rows(project_code, name, [row])
 
 
-def write_rows(project_code: str, name: str, rows: Iterable[Dict[str, Any]]) -> None:
+def append_rows(project_code: str, name: str, rows: Iterable[Dict[str, Any]]) -> None:
+    """Append ``rows`` to a table with one lock and one write."""
+    rows = [dict(r) for r in rows]
+    if not rows:
+        return
+    db = _sqlite(project_code)
+    if db is not None:
+        db.append_rows(name, rows)
+        _changed(project_code, [name])
+        return
+    txn = _active_transaction(project_code)
+    if txn is not None:
+        txn.ops.extend(("append", name, r) for r in rows)
+        return
     path = _csv_path(project_code, name)
     headers = CSV_HEADERS[name]
     os.makedirs(os.path.dirname(path), exist_ok=True)
+    with file_lock(_table_lock_path(project_code, name)):
+        moved = _moved_to_sqlite(project_code)
+        if not moved:
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                f.write(_rows_text(headers, rows, header=f.tell() == 0))
+    if moved:
+        append_rows(project_code, name, rows)
+        return
+    _changed(project_code, [name])
+    # No invalidation: the size change alone makes the next read notice the
+    # rows, and append-only tables then only parse the new bytes.
+
+
+def _write_csv(path: str, headers: List[str], rows: Iterable[Dict[str, Any]]) -> None:
     tmp = path + ".tmp"
     with open(tmp, "w", newline="", encoding="utf-8") as f:
-        portalocker.lock(f, portalocker.LOCK_EX)
         writer = csv.DictWriter(f, fieldnames=headers)
         writer.writeheader()
         for row in rows:
             writer.writerow({k: row.get(k, "") for k in headers})
     os.replace(tmp, path)
+
+
+def write_rows(project_code: str, name: str, rows: Iterable[Dict[str, Any]]) -> None:
+    db = _sqlite(project_code)
+    if db is not None:
+        db.write_rows(name, rows)
+        _changed(project_code, [name])
+        return
+    txn = _active_transaction(project_code)
+    if txn is not None:
+        txn.ops.append(("write", name, [dict(r) for r in rows]))
+        return
+    path = _csv_path(project_code, name)
+    headers = CSV_HEADERS[name]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows = list(rows)
+    with file_lock(_table_lock_path(project_code, name)):
+        moved = _moved_to_sqlite(project_code)
+        if not moved:
+            _write_csv(path, headers, rows)
+            # The rows passed in are the complete new state, so pending deltas are void
+            journal = _journal_path(project_code, name)
+            if os.path.exists(journal):
+                with open(journal, "r+", encoding="utf-8") as f:
+                    f.truncate(0)
+    if moved:
+        write_rows(project_code, name, rows)
+        return
+    invalidate_cache(project_code, name)
+    _changed(project_code, [name])
+
+
+def update_rows(project_code: str, name: str, key: Iterable[Any], changes: Dict[str, Any]) -> int:
+    """Set ``changes`` on the rows whose primary key (TABLE_KEYS) equals ``key``.
+
+    Instead of rewriting the table, one delta record is appended to the
+    table's journal; reads apply it on the fly and the journal is compacted
+    into the CSV every JOURNAL_COMPACT_THRESHOLD records. Returns the number
+    of rows updated (0 when the key does not exist, in which case nothing is
+    written).
+    """
+    columns = TABLE_KEYS[name]
+    bad = [c for c in changes if c not in CSV_HEADERS[name] or c in columns]
+    if bad:
+        raise ValueError(f"Cannot update columns {bad} of {name}")
+    db = _sqlite(project_code)
+    if db is not None:
+        count = db.update_rows(name, key, changes)
+        if count:
+            _changed(project_code, [name])
+        return count
+    index_key = _index_key(tuple(key), columns, False)
+    record = {"key": list(index_key), "changes": {c: "" if v is None else str(v) for c, v in changes.items()}}
+    with locked_table(project_code, name):
+        if _sqlite(project_code) is not None:
+            # Migrated while waiting for the lock
+            return update_rows(project_code, name, key, changes)
+        table = _load_table(project_code, name)
+        with _cache_lock:
+            count = len(table.index(columns).get(index_key, []))
+        if not count:
+            return 0
+        txn = _active_transaction(project_code)
+        if txn is not None:
+            txn.ops.append(("update", name, record))
+            return count
+        with open(_journal_path(project_code, name), "a", newline="", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        _changed(project_code, [name])
+        journal = _load_journal(project_code, name)
+        if journal is not None and len(journal.records) >= JOURNAL_COMPACT_THRESHOLD:
+            compact_table(project_code, name)
+    return count
+
+
+def compact_table(project_code: str, name: str) -> None:
+    """Fold a table's journal into its CSV and empty the journal."""
+    path = _journal_path(project_code, name)
+    if _sqlite(project_code) is not None or not os.path.exists(path):
+        return
+    # The table lock keeps update_rows calls out until the journal is emptied
+    with file_lock(_table_lock_path(project_code, name)):
+        if _moved_to_sqlite(project_code):
+            return
+        with open(path, "r+b") as f:
+            records = _parse_journal(f.read())
+            if records:
+                base = _load_base(project_code, name)
+                merged = _apply_journal(base, records, TABLE_KEYS[name])
+                _write_csv(_csv_path(project_code, name), CSV_HEADERS[name], merged.rows)
+            f.seek(0)
+            f.truncate(0)
+    invalidate_cache(project_code, name)
+
+
+@contextmanager
+def locked_table(project_code: str, name: str) -> Iterator[None]:
+    """Hold a table's write lock for a read-modify-write sequence.
+
+    Other clients' writes to the table wait until the block ends, so rows
+    read inside it are still current when the block writes. The lock is the
+    file ``Locks/<table>.lock``; waiting is bounded (LockTimeout is raised)
+    and locks left by crashed clients are recovered, see app.data.locks.
+    Inside a transaction the lock is kept until the commit. With SQLite
+    storage the block is a database transaction instead.
+    """
+    db = _sqlite(project_code)
+    if db is not None:
+        with db.transaction():
+            yield
+        return
+    txn = _active_transaction(project_code)
+    if txn is not None:
+        txn.locks.enter_context(file_lock(_table_lock_path(project_code, name)))
+        yield
+        return
+    with file_lock(_table_lock_path(project_code, name)):
+        if not _moved_to_sqlite(project_code):
+            yield
+            return
+    with _sqlite(project_code).transaction():
+        yield
+
+
+def modify_rows(project_code: str, name: str, fn: Callable[[List[Dict[str, Any]]], Iterable[Dict[str, Any]]]) -> None:
+    """Replace a table with ``fn(rows)`` without losing concurrent writes.
+
+    Use this instead of read_all() followed by write_rows(): the read, ``fn``
+    and the write all happen under the table lock.
+    """
+    with locked_table(project_code, name):
+        write_rows(project_code, name, list(fn(read_all(project_code, name))))
+
+
+def import_csv_to_sqlite(project_code: str) -> str:
+    """One-shot migration of a project's CSV tables into its SQLite database.
+
+    The project lock and every table lock are held throughout, so no CSV
+    write can slip in between reading the tables and the switch; writers
+    waiting for a lock find the database once they get it and write there
+    instead. The database is built under a temporary name and moved into
+    place at the end. Other clients switch over when their database watcher
+    reports the new file (change_bus.BACKEND), or at their next write. The
+    CSV files are left untouched as a backup. Returns the database path.
+    """
+    path = _sqlite_path(project_code)
+    with file_lock(_project_lock_path(project_code)):
+        if os.path.exists(os.path.join(project_database_dir(project_code), TRANSACTION_JOURNAL_NAME)):
+            _recover_transaction(project_code)
+        with ExitStack() as locks:
+            for name in sorted(CSV_HEADERS):
+                locks.enter_context(file_lock(_table_lock_path(project_code, name)))
+            if os.path.exists(path):
+                raise FileExistsError(path)
+            tmp = path + ".import"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            db = SqliteBackend(tmp, CSV_HEADERS, TABLE_KEYS)
+            try:
+                with db.transaction():
+                    for name in CSV_HEADERS:
+                        if os.path.exists(_csv_path(project_code, name)):
+                            db.write_rows(name, _load_table(project_code, name).rows)
+            finally:
+                db.close()
+            os.replace(tmp, path)
+    _recheck_backend(project_code)
+    change_bus.bump(project_code, set(CSV_HEADERS) | {change_bus.BACKEND})
+    return path
+
+
+def export_sqlite_to_csv(project_code: str, out_dir: str | None = None) -> str:
+    """Write every table of a project's SQLite database back to CSV files.
+
+    By default the CSVs in the project's Database folder are replaced (and
+    their journals emptied); pass ``out_dir`` to export elsewhere instead.
+    The database itself is kept. Returns the output folder.
+    """
+    db = _sqlite(project_code)
+    if db is None:
+        raise FileNotFoundError(_sqlite_path(project_code))
+    out_dir = out_dir or project_database_dir(project_code)
+    os.makedirs(out_dir, exist_ok=True)
+    for name, headers in CSV_HEADERS.items():
+        path = os.path.join(out_dir, name)
+        with file_lock(_table_lock_path(project_code, name)):
+            _write_csv(path, headers, db.read_all(name))
+            if os.path.exists(path + ".journal"):
+                with open(path + ".journal", "r+", encoding="utf-8") as f:
+                    f.truncate(0)
+    invalidate_cache(project_code)
+    change_bus.bump(project_code, CSV_HEADERS)
+    return out_dir
+
+
+def _project_lock_path(project_code: str) -> str:
+    return os.path.join(project_locks_dir(project_code), "database.lock")
+
+
+def _active_transaction(project_code: str) -> _Transaction | None:
+    txn = getattr(_txn_local, "txn", None)
+    return txn if txn is not None and txn.project_code == project_code else None
+
+
+@contextmanager
+def transaction(project_code: str) -> Iterator[None]:
+    """Make every store write in the block take effect together or not at all.
+
+    The project-level lock in ``Locks/`` is held for the whole block, so reads
+    inside it are not interleaved with other clients' transactions. With CSV
+    storage the writes are buffered (reads inside the block do not see them)
+    and committed on exit: the planned file changes are first written to a
+    write-ahead journal, then applied, then the journal is removed. A commit
+    interrupted by a crash is completed by the next seed_tables() call. With
+    SQLite storage the block is a database transaction. Nested blocks for the
+    same project join the outer one.
+    """
+    if _active_transaction(project_code) is not None:
+        yield
+        return
+    txn = _Transaction(project_code)
+    db = _sqlite(project_code)
+    if db is None:
+        with file_lock(_project_lock_path(project_code)):
+            if not _moved_to_sqlite(project_code):
+                with txn.locks:
+                    _txn_local.txn = txn
+                    try:
+                        yield
+                    finally:
+                        _txn_local.txn = None
+                    if txn.ops:
+                        _commit_transaction(txn)
+                        txn.changed.update(name for _, name, _ in txn.ops)
+                change_bus.bump(project_code, txn.changed)
+                return
+        db = _sqlite(project_code)
+    _txn_local.txn = txn
+    try:
+        with db.transaction():
+            yield
+    finally:
+        _txn_local.txn = None
+    change_bus.bump(project_code, txn.changed)
+
+
+def _rows_text(headers: List[str], rows: Iterable[Dict[str, Any]], header: bool) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=headers)
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow({k: row.get(k, "") for k in headers})
+    return buf.getvalue()
+
+
+def _plan_transaction(txn: _Transaction) -> List[Dict[str, Any]]:
+    """Turn buffered table writes into file-level steps that can be replayed.
+
+    "append" steps carry the offset they are expected at so a replay can tell
+    whether they already landed; "replace" steps carry a hash of the content
+    they replace so a replay never clobbers a file that moved on.
+    """
+    db_dir = project_database_dir(txn.project_code)
+    sizes: Dict[str, int] = {}
+    steps: List[Dict[str, Any]] = []
+
+    def size_of(fname: str) -> int:
+        if fname not in sizes:
+            p = os.path.join(db_dir, fname)
+            sizes[fname] = os.path.getsize(p) if os.path.exists(p) else 0
+        return sizes[fname]
+
+    def append(fname: str, data: str) -> None:
+        steps.append({"kind": "append", "file": fname, "offset": size_of(fname), "data": data})
+        sizes[fname] += len(data.encode("utf-8"))
+
+    for kind, name, payload in txn.ops:
+        headers = CSV_HEADERS[name]
+        if kind == "append":
+            append(name, _rows_text(headers, [payload], header=size_of(name) == 0))
+        elif kind == "update":
+            append(name + ".journal", json.dumps(payload, ensure_ascii=False) + "\n")
+        elif kind == "write":
+            p = os.path.join(db_dir, name)
+            before = ""
+            if os.path.exists(p):
+                with open(p, "rb") as f:
+                    before = hashlib.sha1(f.read()).hexdigest()
+            data = _rows_text(headers, payload, header=True)
+            steps.append({"kind": "replace", "file": name, "before": before, "data": data, "clear": name + ".journal"})
+            sizes[name] = len(data.encode("utf-8"))
+            sizes[name + ".journal"] = 0
+    return steps
+
+
+def _apply_step(db_dir: str, step: Dict[str, Any]) -> None:
+    path = os.path.join(db_dir, step["file"])
+    data = step["data"].encode("utf-8")
+    if step["kind"] == "append":
+        with open(path, "a+b") as f:
+            f.seek(step["offset"])
+            if f.read(len(data)) == data:
+                return
+            f.seek(0, os.SEEK_END)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    elif step["kind"] == "replace":
+        current = ""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                content = f.read()
+            if content == data:
+                return
+            current = hashlib.sha1(content).hexdigest()
+        if current != step["before"]:
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        clear = os.path.join(db_dir, step["clear"])
+        if os.path.exists(clear):
+            with open(clear, "r+b") as f:
+                f.truncate(0)
+
+
+def _commit_transaction(txn: _Transaction) -> None:
+    db_dir = project_database_dir(txn.project_code)
+    journal = os.path.join(db_dir, TRANSACTION_JOURNAL_NAME)
+    # Table locks in name order, so two committers can never deadlock
+    for name in sorted({name for _, name, _ in txn.ops}):
+        txn.locks.enter_context(file_lock(_table_lock_path(txn.project_code, name)))
+    steps = _plan_transaction(txn)
+    tmp = journal + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"steps": steps}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, journal)
+    for step in steps:
+        _apply_step(db_dir, step)
+    os.remove(journal)
+    for name in {name for _, name, _ in txn.ops}:
+        invalidate_cache(txn.project_code, name)
+    # update_rows() leaves compaction of buffered deltas to the commit; the
+    # table locks are still held here
+    for name in sorted({name for kind, name, _ in txn.ops if kind == "update"}):
+        deltas = _load_journal(txn.project_code, name)
+        if deltas is not None and len(deltas.records) >= JOURNAL_COMPACT_THRESHOLD:
+            compact_table(txn.project_code, name)
+
+
+def _recover_transaction(project_code: str) -> None:
+    """Finish a commit that was interrupted; call with the project lock held."""
+    db_dir = project_database_dir(project_code)
+    journal = os.path.join(db_dir, TRANSACTION_JOURNAL_NAME)
+    if not os.path.exists(journal):
+        return
+    try:
+        with open(journal, "r", encoding="utf-8") as f:
+            steps = json.load(f)["steps"]
+    except (ValueError, KeyError):
+        # The journal is put in place atomically, so this is not ours to redo
+        steps = []
+    tables = sorted({step["file"][:-len(".journal")] if step["file"].endswith(".journal") else step["file"] for step in steps})
+    with ExitStack() as locks:
+        for name in tables:
+            locks.enter_context(file_lock(_table_lock_path(project_code, name)))
+        for step in steps:
+            _apply_step(db_dir, step)
+        os.remove(journal)
+    invalidate_cache(project_code)
+    change_bus.bump(project_code, tables)
@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from PyQt5 import QtWidgets
 from app.ui.main_window import MainWindow
@@ -16,4 +17,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # STEP translation runs in spawned child processes (app.assembly.step_loader)
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,180 @@
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from app.data import change_bus
+from app.utils.paths import REVISION_PPT_NAME, cad_parts_dir
+
+# Full re-walk of the tree, in the background, as a safety net for watcher
+# events that never arrived (share reconnects, files copied while offline)
+RESCAN_INTERVAL_S = 600.0
+
+_REV_DIR = re.compile(r"^rev_(\d+)$", re.IGNORECASE)
+
+
+@dataclass
+class _RevisionTree:
+    parts_dir: str
+    scanned_at: float
+    # (lower-cased part_base, rev_index) -> lower-cased file names in rev_NNN
+    files: Dict[Tuple[str, int], Set[str]] = field(default_factory=dict)
+    # Events seen while a background rescan runs, replayed onto its result
+    pending: List[Tuple[str, bool, bool]] | None = None
+
+
+_lock = threading.Lock()
+_trees: Dict[str, _RevisionTree] = {}
+_stats = {"scans": 0, "events": 0}
+
+
+def _entries(path: str) -> List[os.DirEntry]:
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def _scan_part(files: Dict[Tuple[str, int], Set[str]], part_path: str, part: str) -> None:
+    for rev in _entries(part_path):
+        m = _REV_DIR.match(rev.name)
+        if m and rev.is_dir():
+            files[(part.lower(), int(m.group(1)))] = {e.name.lower() for e in _entries(rev.path) if e.is_file()}
+
+
+def _scan(project_code: str) -> _RevisionTree:
+    tree = _RevisionTree(parts_dir=cad_parts_dir(project_code), scanned_at=time.monotonic())
+    for part in _entries(tree.parts_dir):
+        if part.is_dir():
+            _scan_part(tree.files, part.path, part.name)
+    with _lock:
+        _stats["scans"] += 1
+    return tree
+
+
+def _ppt_revisions(files: Dict[Tuple[str, int], Set[str]], part: str | None = None) -> Set[Tuple[str, int]]:
+    """Revisions (of ``part``, or all) whose folder holds the change presentation."""
+    ppt = REVISION_PPT_NAME.lower()
+    return {key for key, names in files.items() if (part is None or key[0] == part) and ppt in names}
+
+
+def _apply(tree: _RevisionTree, path: str, is_directory: bool, exists: bool) -> bool:
+    """Apply one event to ``tree``.
+
+    Returns whether has_revision_ppt() may now answer differently, which is
+    False for anything outside CAD/Parts and for files other than the
+    presentation.
+    """
+    try:
+        rel = os.path.relpath(path, tree.parts_dir)
+    except ValueError:
+        # Different drive
+        return False
+    if rel == os.curdir or rel.startswith(os.pardir):
+        return False
+    names = rel.split(os.sep)
+    part = names[0].lower()
+    if len(names) == 1 and is_directory:
+        before = _ppt_revisions(tree.files, part)
+        for key in [k for k in tree.files if k[0] == part]:
+            del tree.files[key]
+        if exists:
+            _scan_part(tree.files, path, names[0])
+        return _ppt_revisions(tree.files, part) != before
+    m = _REV_DIR.match(names[1]) if len(names) > 1 else None
+    if m is None:
+        return False
+    key = (part, int(m.group(1)))
+    ppt = REVISION_PPT_NAME.lower()
+    before = ppt in tree.files.get(key, ())
+    if len(names) == 2 and is_directory:
+        tree.files.pop(key, None)
+        if exists:
+            tree.files[key] = {e.name.lower() for e in _entries(path) if e.is_file()}
+    elif len(names) == 3 and not is_directory:
+        if exists:
+            tree.files.setdefault(key, set()).add(names[2].lower())
+        elif key in tree.files:
+            tree.files[key].discard(names[2].lower())
+    return (ppt in tree.files.get(key, ())) != before
+
+
+def _rescan(project_code: str, old: _RevisionTree) -> None:
+    try:
+        tree = _scan(project_code)
+    except Exception:
+        tree = None
+    with _lock:
+        if _trees.get(project_code) is not old:
+            return
+        if tree is None:
+            old.pending = None
+            old.scanned_at = time.monotonic()
+            return
+        for event in old.pending or []:
+            _apply(tree, *event)
+        _trees[project_code] = tree
+        changed = _ppt_revisions(tree.files) != _ppt_revisions(old.files)
+    if changed:
+        change_bus.bump(project_code, [change_bus.ARTIFACTS])
+
+
+def _tree(project_code: str) -> _RevisionTree:
+    with _lock:
+        tree = _trees.get(project_code)
+        if tree is not None:
+            if tree.pending is None and time.monotonic() - tree.scanned_at > RESCAN_INTERVAL_S:
+                tree.pending = []
+                threading.Thread(target=_rescan, args=(project_code, tree), daemon=True).start()
+            return tree
+    tree = _scan(project_code)
+    with _lock:
+        return _trees.setdefault(project_code, tree)
+
+
+def has_revision_ppt(project_code: str, part_base: str, rev_index: int) -> bool:
+    """Whether ``rev_NNN`` of a part holds its change presentation.
+
+    Answered from a cached listing of ``CAD/Parts`` that is built with one
+    walk and then kept current by note_event(), so repeated queries touch
+    neither the share nor the project registry.
+    """
+    tree = _tree(project_code)
+    with _lock:
+        return REVISION_PPT_NAME.lower() in tree.files.get((part_base.lower(), int(rev_index)), ())
+
+
+def note_event(project_code: str, path: str, is_directory: bool, exists: bool) -> None:
+    """Update the cached tree for a created/modified (``exists``) or deleted path.
+
+    Only changes that add or remove a revision's presentation are reported
+    on the change bus (as ARTIFACTS); the many events of a STEP file being
+    copied in are not, so views do not rebuild while a drop is in progress.
+    """
+    with _lock:
+        tree = _trees.get(project_code)
+        if tree is None:
+            return
+        _stats["events"] += 1
+        if tree.pending is not None:
+            tree.pending.append((path, is_directory, exists))
+        changed = _apply(tree, path, is_directory, exists)
+    if changed:
+        change_bus.bump(project_code, [change_bus.ARTIFACTS])
+
+
+def invalidate(project_code: str | None = None) -> None:
+    """Forget the cached tree(s); the next query walks the folders again."""
+    with _lock:
+        if project_code is None:
+            _trees.clear()
+        else:
+            _trees.pop(project_code, None)
+
+
+def cache_stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats, projects=len(_trees))
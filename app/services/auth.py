@@ -16,18 +16,18 @@ class CurrentUser:
 
 def get_current_user(project_code: str) -> Optional[CurrentUser]:
     username = getpass.getuser()
-    users = store.read_all(project_code, "users.csv")
-    for u in users:
-        if u.get("username", "").lower() == username.lower():
-            return CurrentUser(
-                username=u.get("username", username),
-                display_name=u.get("display_name", username),
-                email=u.get("email", ""),
-                role=u.get("role", "designer"),
-                team=u.get("team", ""),
-                manager_username=u.get("manager_username", ""),
-                active=(u.get("active", "true").lower() == "true"),
-            )
+    users = store.find_by(project_code, "users.csv", ignore_case=True, username=username)
+    if users:
+        u = users[0]
+        return CurrentUser(
+            username=u.get("username", username),
+            display_name=u.get("display_name", username),
+            email=u.get("email", ""),
+            role=u.get("role", "designer"),
+            team=u.get("team", ""),
+            manager_username=u.get("manager_username", ""),
+            active=(u.get("active", "true").lower() == "true"),
+        )
     # if not found, return minimal user
     return CurrentUser(username=username, display_name=username, email="", role="designer", team="", manager_username="", active=True)
 
@@ -4,11 +4,8 @@ from app.services.notifications import send_email
 
 
 def _get_user_email(project: str, username: str) -> str:
-    users = store.read_all(project, "users.csv")
-    for u in users:
-        if u.get("username", "").lower() == (username or "").lower():
-            return u.get("email", "")
-    return ""
+    users = store.find_by(project, "users.csv", ignore_case=True, username=username or "")
+    return users[0].get("email", "") if users else ""
 
 
 def notify_analysis_created(project: str, analysis_row: dict) -> None:
@@ -28,11 +25,8 @@ def notify_analysis_created(project: str, analysis_row: dict) -> None:
 
 
 def _find_part_owner(project: str, part_base: str) -> str:
-    parts = store.read_all(project, "parts.csv")
-    for p in parts:
-        if p.get("project") == project and p.get("part_base") == part_base:
-            return p.get("owner_username", "")
-    return ""
+    p = store.get_by_key(project, "parts.csv", (project, part_base))
+    return p.get("owner_username", "") if p else ""
 
 
 def notify_status_change(project: str, analysis_row: dict) -> None:
@@ -45,12 +39,8 @@ def notify_status_change(project: str, analysis_row: dict) -> None:
         to.append(_get_user_email(project, owner))
     # CC manager on results ready and presented
     if status in ("results are ready for evaluation", "presented") and owner:
-        users = store.read_all(project, "users.csv")
-        mgr_user = None
-        for u in users:
-            if u.get("username", "") == owner:
-                mgr_user = u.get("manager_username", "")
-                break
+        owner_row = store.get_by_key(project, "users.csv", (owner,))
+        mgr_user = owner_row.get("manager_username", "") if owner_row else None
         if mgr_user:
             cc.append(_get_user_email(project, mgr_user))
     send_email(
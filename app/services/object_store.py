@@ -0,0 +1,155 @@
+import filecmp
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import threading
+from typing import Tuple
+
+from app.config.settings import get_project_root
+from app.utils.paths import object_path, project_objects_dir
+
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+_log = logging.getLogger("app.object_store")
+
+
+def _read_hashing(path: str, sink, chunk_bytes: int, cancel: threading.Event | None) -> str:
+    """SHA-1 of a file, read in chunks that are also passed to ``sink`` (if any)."""
+    h = hashlib.sha1()
+    buf = bytearray(chunk_bytes)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise InterruptedError(path)
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+            if sink is not None:
+                sink.write(view[:n])
+    return h.hexdigest()
+
+
+def file_sha1(path: str, chunk_bytes: int = HASH_CHUNK_BYTES, cancel: threading.Event | None = None) -> str:
+    """SHA-1 of a file, read in chunks so memory use stays flat for large STEPs.
+
+    Raises InterruptedError as soon as ``cancel`` is set.
+    """
+    return _read_hashing(path, None, chunk_bytes, cancel)
+
+
+def _in_project(project_code: str, path: str) -> bool:
+    root = os.path.normcase(os.path.abspath(get_project_root(project_code)))
+    path = os.path.normcase(os.path.abspath(path))
+    return os.path.commonprefix([root + os.sep, path]) == root + os.sep
+
+
+def _same_file(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _place(src: str, dst: str, link: bool) -> None:
+    """Atomically make ``dst`` a hard link to (or, without ``link``, a copy of) ``src``."""
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        if link:
+            os.link(src, tmp)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _make_read_only(path: str) -> None:
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def put(project_code: str, src: str, sha1: str) -> Tuple[str, bool]:
+    """Make ``src`` (with content hash ``sha1``) part of the project's object store.
+
+    Returns the path to record for the file and whether its content was
+    already stored. Stored objects are read-only, so their content always
+    matches their name. Files inside the project are hard-linked with their
+    object (which makes them read-only too: changes must be saved as a new
+    revision), so a duplicate becomes a second name for the existing file
+    rather than a second copy; the recorded path then stays the original
+    one. Where the file system has no hard links such files are left as
+    they are, not copied. Files from outside (local disks, supplier drops)
+    are copied in and the object path is returned. Safe to call repeatedly
+    for the same file.
+    """
+    suffix = os.path.splitext(src)[1].lower() or ".step"
+    obj = object_path(project_code, sha1, suffix)
+    inside = _in_project(project_code, src)
+    existed = os.path.exists(obj)
+    if not existed:
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        try:
+            _place(src, obj, link=inside)
+        except OSError as e:
+            if not inside:
+                raise
+            # Copying would store the file twice
+            _log.warning("Could not link %s into the object store, leaving it unshared: %s", src, e)
+            return src, False
+        _make_read_only(obj)
+    elif inside and not _same_file(src, obj):
+        # Compared byte for byte: src may have changed since it was hashed
+        if filecmp.cmp(src, obj, shallow=False):
+            try:
+                _place(obj, src, link=True)
+            except OSError as e:
+                _log.warning("Could not deduplicate %s: %s", src, e)
+        else:
+            _log.warning("%s changed since it was hashed; not deduplicated", src)
+    return (src if inside else obj), existed
+
+
+def ingest(project_code: str, src: str, cancel: threading.Event | None = None) -> Tuple[str, str, bool]:
+    """Hash ``src`` and put it in the object store, see put().
+
+    Returns the SHA-1, the path to record and whether the content was
+    already stored. Files from outside the project are hashed while they
+    are copied in, so each is read only once. Raises InterruptedError as
+    soon as ``cancel`` is set.
+    """
+    if _in_project(project_code, src):
+        sha1 = file_sha1(src, cancel=cancel)
+        return (sha1,) + put(project_code, src, sha1)
+    staging = project_objects_dir(project_code)
+    os.makedirs(staging, exist_ok=True)
+    tmp = os.path.join(staging, f"incoming.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as out:
+            sha1 = _read_hashing(src, out, HASH_CHUNK_BYTES, cancel)
+        obj = object_path(project_code, sha1, os.path.splitext(src)[1].lower() or ".step")
+        existed = os.path.exists(obj)
+        if not existed:
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            try:
+                os.replace(tmp, obj)
+            except OSError:
+                # Another client stored the same content meanwhile
+                if not os.path.exists(obj):
+                    raise
+                existed = True
+            else:
+                _make_read_only(obj)
+    finally:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return sha1, obj, existed
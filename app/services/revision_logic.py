@@ -1,8 +1,12 @@
 import os
 import re
 import time
-from typing import Dict, List, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple
 from app.data import store
+from app.services import object_store
 from app.utils.paths import revision_ppt_path
 
 REV_REGEX = re.compile(r"^(?P<base>.+)_(?P<rev>\d{3})$")
@@ -16,57 +20,210 @@ def parse_rev_from_filename(filename: str) -> Tuple[str, int] | None:
     return m.group("base"), int(m.group("rev"))
 
 
-def ensure_revision_row(project: str, part_base: str, rev_index: int, step_path: str, uploaded_by: str) -> None:
-    rows = store.read_all(project, "revisions.csv")
-    rev_name = f"{part_base}_{rev_index:03d}"
-    exists = any(r.get("project") == project and r.get("part_base") == part_base and r.get("rev_index") == str(rev_index) for r in rows)
-    if exists:
-        return
-    store.append_row(project, "revisions.csv", {
+# Files are hashed in parallel: hashlib releases the GIL on large buffers,
+# and on a network share several reads in flight hide the latency
+HASH_WORKERS = 6
+
+STEP_SUFFIXES = (".step", ".stp")
+
+
+@dataclass
+class BulkIngestResult:
+    added: int = 0
+    already_present: int = 0
+    bytes_hashed: int = 0
+    unparsed: List[str] = field(default_factory=list)
+    # Further files for a (part, rev) already taken from another file
+    duplicates: List[str] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    cancelled: bool = False
+
+
+def _new_revision_row(project: str, part_base: str, rev_index: int, step_path: str, uploaded_by: str, sha1: str = "", size_bytes: int | None = None) -> Dict[str, str]:
+    if size_bytes is None and os.path.exists(step_path):
+        size_bytes = os.path.getsize(step_path)
+    return {
         "project": project,
         "part_base": part_base,
         "rev_index": rev_index,
-        "rev_name": rev_name,
+        "rev_name": f"{part_base}_{rev_index:03d}",
         "step_path": step_path,
         "cad_system": "",
         "uploaded_by": uploaded_by,
         "uploaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "sha1": "",
-        "size_bytes": str(os.path.getsize(step_path)) if os.path.exists(step_path) else "",
+        "sha1": sha1,
+        "size_bytes": "" if size_bytes is None else str(size_bytes),
         "pending_activation": "true",
         "activated_by": "",
         "activated_at": "",
-    })
+    }
+
+
+def _digest(project: str, path: str, cancel: threading.Event | None = None) -> Tuple[str, int, str]:
+    """Hash ``path`` and put it in the object store: (sha1, size, path to record)."""
+    size = os.path.getsize(path)
+    sha1, stored, _ = object_store.ingest(project, path, cancel=cancel)
+    return sha1, size, stored
+
+
+def ensure_revision_rows(project: str, revisions: Iterable[Tuple[str, int, str]], uploaded_by: str, digests: Dict[str, Tuple[str, int, str]] | None = None, errors: List[Tuple[str, str]] | None = None, cancel: threading.Event | None = None) -> int:
+    """Add a row for each ``(part_base, rev_index, step_path)`` not in revisions.csv yet.
+
+    New files are hashed and put in the project's object store (see
+    app.services.object_store) before the table lock is taken; ``digests``
+    maps a step_path to an already computed ``(sha1, size, stored path)``.
+    A file that cannot be read raises OSError, unless ``errors`` is given:
+    it is then recorded there as ``(path, message)`` and the rest of the
+    batch is still added. Setting ``cancel`` stops the hashing
+    (InterruptedError). The batch is then re-checked and appended under one
+    table lock. Returns the number of rows added.
+    """
+    new = {}
+    for part_base, rev_index, step_path in revisions:
+        if (part_base, rev_index) not in new and store.get_by_key(project, "revisions.csv", (project, part_base, rev_index)) is None:
+            new[(part_base, rev_index)] = step_path
+    digests = dict(digests or {})
+    failed = set()
+    for step_path in new.values():
+        if step_path in digests or not os.path.exists(step_path):
+            continue
+        try:
+            digests[step_path] = _digest(project, step_path, cancel)
+        except InterruptedError:
+            raise
+        except OSError as e:
+            if errors is None:
+                raise
+            errors.append((step_path, str(e)))
+            failed.add(step_path)
+    rows = []
+    # Locked so two clients seeing the same new file cannot both add it
+    with store.locked_table(project, "revisions.csv"):
+        for (part_base, rev_index), step_path in new.items():
+            if step_path in failed or store.get_by_key(project, "revisions.csv", (project, part_base, rev_index)) is not None:
+                continue
+            sha1, size, stored = digests.get(step_path, ("", None, step_path))
+            rows.append(_new_revision_row(project, part_base, rev_index, stored, uploaded_by, sha1, size))
+        store.append_rows(project, "revisions.csv", rows)
+    return len(rows)
+
+
+def ensure_revision_row(project: str, part_base: str, rev_index: int, step_path: str, uploaded_by: str, cancel: threading.Event | None = None) -> None:
+    ensure_revision_rows(project, [(part_base, rev_index, step_path)], uploaded_by, cancel=cancel)
+
+
+def ensure_parts(project: str, part_bases: Iterable[str], owner: str) -> int:
+    """Add a parts.csv row, owned by ``owner``, for each part not listed yet."""
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    with store.locked_table(project, "parts.csv"):
+        new = [p for p in dict.fromkeys(part_bases) if store.get_by_key(project, "parts.csv", (project, p)) is None]
+        store.append_rows(project, "parts.csv", [{
+            "project": project,
+            "part_base": p,
+            "title": p,
+            "owner_username": owner,
+            "manager_override_username": "",
+            "active_rev": "",
+            "notes": "",
+            "created_at": now,
+            "updated_at": now,
+        } for p in new])
+    return len(new)
+
+
+def find_step_files(folder: str) -> List[str]:
+    """All STEP files below ``folder``, sorted."""
+    found = []
+    for dirpath, _, files in os.walk(folder):
+        found.extend(os.path.join(dirpath, f) for f in files if f.lower().endswith(STEP_SUFFIXES))
+    return sorted(found)
+
+
+def bulk_ingest(project: str, folder: str, uploaded_by: str, workers: int = HASH_WORKERS, progress: Callable[[int, int], None] | None = None, cancel: threading.Event | None = None) -> BulkIngestResult:
+    """Register every STEP file below ``folder`` as a new revision.
+
+    Files whose revision is already known are skipped before any hashing,
+    as are further files for a (part, rev) that an earlier file already
+    covers. The rest are hashed and put in the object store on ``workers``
+    threads, largest first, and all new rows are appended in one locked
+    batch at the end. ``progress(done, total)`` is called on the calling
+    thread as files finish. Setting ``cancel`` stops the hashing in flight
+    and returns at once; nothing is written then.
+    """
+    result = BulkIngestResult()
+    todo: List[Tuple[str, int, str, int]] = []
+    seen = set()
+    for path in find_step_files(folder):
+        parsed = parse_rev_from_filename(path)
+        if not parsed:
+            result.unparsed.append(path)
+            continue
+        if parsed in seen:
+            result.duplicates.append(path)
+            continue
+        seen.add(parsed)
+        if store.get_by_key(project, "revisions.csv", (project, parsed[0], parsed[1])) is not None:
+            result.already_present += 1
+            continue
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            result.errors.append((path, str(e)))
+            continue
+        todo.append((parsed[0], parsed[1], path, size))
+    # Largest first, so one huge file does not run alone at the end
+    todo.sort(key=lambda t: -t[3])
+
+    digests: Dict[str, Tuple[str, int, str]] = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sha1")
+    try:
+        futures = {pool.submit(_digest, project, path, cancel): (path, size) for _, _, path, size in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            if cancel is not None and cancel.is_set():
+                result.cancelled = True
+                return result
+            path, size = futures[future]
+            try:
+                digests[path] = future.result()
+                result.bytes_hashed += size
+            except OSError as e:
+                result.errors.append((path, str(e)))
+            if progress is not None:
+                progress(done, len(todo))
+    finally:
+        # On cancel, jobs still hashing notice the event and stop by themselves
+        pool.shutdown(wait=not result.cancelled, cancel_futures=True)
+    if cancel is not None and cancel.is_set():
+        result.cancelled = True
+        return result
+
+    revisions = [(part, rev, path) for part, rev, path, _ in todo if path in digests]
+    result.added = ensure_revision_rows(project, revisions, uploaded_by, digests)
+    result.already_present += len(revisions) - result.added
+    ensure_parts(project, [part for part, _, _ in revisions], uploaded_by)
+    return result
 
 
 def has_required_artifacts(project: str, part_base: str, rev_index: int) -> bool:
     ppt = revision_ppt_path(project, part_base, rev_index)
-    notes = store.read_all(project, "revision_history.csv")
-    has_note = any(
-        n.get("project") == project and n.get("part_base") == part_base and n.get("rev_index") == str(rev_index)
-        and n.get("what_changed") and n.get("why") and n.get("impacts")
-        for n in notes
-    )
+    notes = store.find_by(project, "revision_history.csv", project=project, part_base=part_base, rev_index=rev_index)
+    has_note = any(n.get("what_changed") and n.get("why") and n.get("impacts") for n in notes)
     return os.path.exists(ppt) and has_note
 
 
 def activate_revision(project: str, part_base: str, rev_index: int, by_username: str) -> bool:
     if not has_required_artifacts(project, part_base, rev_index):
         return False
-    parts = store.read_all(project, "parts.csv")
-    for p in parts:
-        if p.get("project") == project and p.get("part_base") == part_base:
-            p["active_rev"] = str(rev_index)
-            p["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
-    store.write_rows(project, "parts.csv", parts)
-
-    revs = store.read_all(project, "revisions.csv")
-    for r in revs:
-        if r.get("project") == project and r.get("part_base") == part_base and r.get("rev_index") == str(rev_index):
-            r["pending_activation"] = "false"
-            r["activated_by"] = by_username
-            r["activated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
-    store.write_rows(project, "revisions.csv", revs)
+    with store.transaction(project):
+        store.update_rows(project, "parts.csv", (project, part_base), {
+            "active_rev": str(rev_index),
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        store.update_rows(project, "revisions.csv", (project, part_base, rev_index), {
+            "pending_activation": "false",
+            "activated_by": by_username,
+            "activated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
     return True
 
 
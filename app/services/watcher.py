@@ -1,48 +1,174 @@
+import logging
 import os
 import threading
+import time
+from typing import Callable, Dict, List, Tuple
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from app.config.settings import get_project_root
-from app.services.revision_logic import parse_rev_from_filename, ensure_revision_row
-from app.utils.paths import revision_ppt_path
+from app.services.revision_logic import parse_rev_from_filename, ensure_revision_rows
 from app.data import store
-from time import strftime
+from app.services import artifact_cache
 import getpass
 
+# A path is processed once it has had no events for this long and its size
+# and mtime did not change across one more such interval
+DEBOUNCE_SECONDS = 1.0
+
+_WATCHED_SUFFIXES = ('.step', '.stp', '.pptx')
+_log = logging.getLogger("app.watcher")
+
+
+def _stat(path: str) -> Tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+class _EventBatcher:
+    """Coalesces events per path and passes settled paths to ``process`` in batches.
+
+    Runs ``process`` on its own worker thread, never on the observer thread.
+    Deleted paths are passed on right away; existing files only once they
+    stop growing, so a large copy is handled once, after it finished.
+    """
+
+    def __init__(self, process: Callable[[List[str]], None], window_s: float = DEBOUNCE_SECONDS):
+        self.process = process
+        self.window_s = window_s
+        # path -> (time of last event, size/mtime at the last check)
+        self._pending: Dict[str, Tuple[float, Tuple[int, int] | None]] = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="cad-watcher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def add(self, path: str) -> None:
+        with self._cond:
+            previous = self._pending.get(path)
+            self._pending[path] = (time.monotonic(), previous[1] if previous else None)
+            self._cond.notify()
+
+    def _due(self) -> Dict[str, float] | None:
+        """Paths quiet for a full window; None once stopped."""
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                due = {p: t for p, (t, _) in self._pending.items() if now - t >= self.window_s}
+                if due:
+                    return due
+                wait = min((self.window_s - (now - t) for t, _ in self._pending.values()), default=None)
+                self._cond.wait(timeout=wait)
+            return None
+
+    def _run(self) -> None:
+        while True:
+            due = self._due()
+            if due is None:
+                return
+            ready = []
+            for path, event_time in due.items():
+                sig = _stat(path)
+                with self._cond:
+                    entry = self._pending.get(path)
+                    if entry is None or entry[0] != event_time:
+                        # New events arrived meanwhile; keep waiting
+                        continue
+                    if sig is None or sig == entry[1]:
+                        del self._pending[path]
+                        ready.append(path)
+                    else:
+                        self._pending[path] = (time.monotonic(), sig)
+            if ready:
+                try:
+                    self.process(sorted(ready))
+                except Exception:
+                    _log.exception("Processing watcher batch failed")
+
 
 class CadEventHandler(FileSystemEventHandler):
-    def __init__(self, project: str, on_change):
+    def __init__(self, project: str, on_change=None, debounce_s: float = DEBOUNCE_SECONDS):
         super().__init__()
         self.project = project
         self.on_change = on_change
+        self.batcher = _EventBatcher(self._process_batch, debounce_s)
 
     def on_created(self, event):
-        self._handle(event)
+        artifact_cache.note_event(self.project, event.src_path, event.is_directory, True)
+        self._queue(event.src_path, event.is_directory)
 
     def on_modified(self, event):
-        self._handle(event)
+        artifact_cache.note_event(self.project, event.src_path, event.is_directory, True)
+        self._queue(event.src_path, event.is_directory)
 
-    def _handle(self, event):
-        if event.is_directory:
-            return
-        path = event.src_path
-        lower = path.lower()
-        if lower.endswith('.step') or lower.endswith('.stp'):
-            parsed = parse_rev_from_filename(path)
-            if parsed:
-                part_base, rev_index = parsed
-                ensure_revision_row(self.project, part_base, rev_index, path, getpass.getuser())
-                self.on_change()
-        elif lower.endswith('.pptx'):
-            # if PPT placed at standard path for some rev, just trigger UI refresh
+    def on_deleted(self, event):
+        artifact_cache.note_event(self.project, event.src_path, event.is_directory, False)
+        self._queue(event.src_path, event.is_directory)
+
+    def on_moved(self, event):
+        artifact_cache.note_event(self.project, event.src_path, event.is_directory, False)
+        artifact_cache.note_event(self.project, event.dest_path, event.is_directory, True)
+        # Editors often save to a temp name and rename over the target
+        self._queue(event.dest_path, event.is_directory)
+
+    def _queue(self, path: str, is_directory: bool):
+        if not is_directory and path.lower().endswith(_WATCHED_SUFFIXES):
+            self.batcher.add(path)
+
+    def _process_batch(self, paths: List[str]):
+        """Runs on the batcher's worker thread with deduplicated, settled paths."""
+        revisions = []
+        for path in paths:
+            if path.lower().endswith(('.step', '.stp')) and os.path.exists(path):
+                parsed = parse_rev_from_filename(path)
+                if parsed:
+                    revisions.append((parsed[0], parsed[1], path))
+        if revisions:
+            errors = []
+            try:
+                ensure_revision_rows(self.project, revisions, getpass.getuser(), errors=errors)
+            except store.LockTimeout:
+                # Another client holds revisions.csv; try these files again later
+                _log.warning("revisions.csv busy, requeued %d file(s)", len(revisions))
+                for _, _, path in revisions:
+                    self.batcher.add(path)
+                return
+            for path, message in errors:
+                # Registered on its next change, or by Ingest / Bulk Ingest
+                _log.warning("Could not register %s: %s", path, message)
+        self._notify()
+
+    def _notify(self):
+        # Views follow the change bus; on_change is for extra callers
+        if self.on_change is not None:
             self.on_change()
 
 
 class ProjectWatcher:
-    def __init__(self, project: str, on_change):
+    """Watches a project's CAD folder.
+
+    ``on_change`` is called on a worker thread after each processed batch,
+    so it must not touch widgets; the GUI follows the change bus instead
+    (see app.ui.qt_bridge).
+    """
+
+    def __init__(self, project: str, on_change=None, debounce_s: float = DEBOUNCE_SECONDS):
         self.project = project
         self.on_change = on_change
+        self.debounce_s = debounce_s
         self.observer: Observer | None = None
+        self.handler: CadEventHandler | None = None
 
     def start(self):
         self.stop()
@@ -50,9 +176,10 @@ class ProjectWatcher:
         cad_dir = os.path.join(root, 'CAD')
         if not os.path.exists(cad_dir):
             return
-        handler = CadEventHandler(self.project, self.on_change)
+        self.handler = CadEventHandler(self.project, self.on_change, self.debounce_s)
+        self.handler.batcher.start()
         self.observer = Observer()
-        self.observer.schedule(handler, cad_dir, recursive=True)
+        self.observer.schedule(self.handler, cad_dir, recursive=True)
         self.observer.start()
 
     def stop(self):
@@ -63,3 +190,7 @@ class ProjectWatcher:
             except Exception:
                 pass
             self.observer = None
+            self.handler.batcher.stop()
+            self.handler = None
+            # Unwatched from here on, so the cached listing would go stale
+            artifact_cache.invalidate(self.project)
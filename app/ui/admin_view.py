@@ -1,5 +1,5 @@
 from PyQt5 import QtWidgets
-from app.config.settings import load_admin_settings, load_projects_registry, ADMIN_CONFIG_PATH, PROJECTS_REGISTRY_PATH
+from app.config.settings import load_admin_settings, load_projects_registry, reload_projects, ADMIN_CONFIG_PATH, PROJECTS_REGISTRY_PATH
 from app.utils.paths import ensure_project_skeleton
 from app.data import store
 import os
@@ -39,8 +39,16 @@ class AdminView(QtWidgets.QWidget):
         proj_layout.addWidget(btn_browse)
         proj_layout.addWidget(btn_add)
 
+        storage_box = QtWidgets.QGroupBox("Storage (current project)")
+        storage_layout = QtWidgets.QHBoxLayout(storage_box)
+        btn_to_sqlite = QtWidgets.QPushButton("Migrate CSV → SQLite")
+        btn_to_csv = QtWidgets.QPushButton("Export SQLite → CSV")
+        storage_layout.addWidget(btn_to_sqlite)
+        storage_layout.addWidget(btn_to_csv)
+
         layout.addWidget(cred_box)
         layout.addWidget(proj_box)
+        layout.addWidget(storage_box)
 
         # Load existing admin config
         s = load_admin_settings()
@@ -50,6 +58,8 @@ class AdminView(QtWidgets.QWidget):
         btn_save.clicked.connect(self.save_admin)
         btn_browse.clicked.connect(self.browse_root)
         btn_add.clicked.connect(self.add_project)
+        btn_to_sqlite.clicked.connect(self.migrate_to_sqlite)
+        btn_to_csv.clicked.connect(self.export_to_csv)
 
     def save_admin(self):
         s = load_admin_settings()
@@ -57,7 +67,7 @@ class AdminView(QtWidgets.QWidget):
             "admin_username": self.user_edit.text().strip() or s.admin_username,
             "admin_password": self.pass_edit.text().strip() or s.admin_password,
             "default_project": s.default_project,
-            "ui": {"refresh_seconds": s.refresh_seconds},
+            "ui": {"poll_seconds": s.poll_seconds},
         }
         os.makedirs(os.path.dirname(ADMIN_CONFIG_PATH), exist_ok=True)
         with open(ADMIN_CONFIG_PATH, "w", encoding="utf-8") as f:
@@ -94,9 +104,42 @@ class AdminView(QtWidgets.QWidget):
         with open(PROJECTS_REGISTRY_PATH, "w", encoding="utf-8") as f:
             for l in lines:
                 f.write(l + "\n")
+        reload_projects()
         ensure_project_skeleton(code)
         store.seed_tables(code)
         # Immediately refresh project list in main window
         if hasattr(self.main_window, "reload_projects"):
             self.main_window.reload_projects(select_code=code)
         QtWidgets.QMessageBox.information(self, "Project saved", f"{code} at {root}")
+
+    def migrate_to_sqlite(self):
+        code = self.main_window.current_project
+        confirm = QtWidgets.QMessageBox.question(
+            self,
+            "Migrate to SQLite",
+            f"Import all {code} CSV tables into a SQLite database?\n"
+            "Writes by other clients wait until the import is done; clients then switch to the database. The CSV files are kept as a backup.",
+        )
+        if confirm != QtWidgets.QMessageBox.Yes:
+            return
+        try:
+            path = store.import_csv_to_sqlite(code)
+        except FileExistsError:
+            QtWidgets.QMessageBox.information(self, "Already migrated", f"{code} already uses SQLite.")
+            return
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
+        QtWidgets.QMessageBox.information(self, "Migrated", f"{code} now stored in {path}")
+
+    def export_to_csv(self):
+        code = self.main_window.current_project
+        try:
+            out_dir = store.export_sqlite_to_csv(code)
+        except FileNotFoundError:
+            QtWidgets.QMessageBox.information(self, "Not migrated", f"{code} has no SQLite database.")
+            return
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
+        QtWidgets.QMessageBox.information(self, "Exported", f"CSV tables written to {out_dir}")
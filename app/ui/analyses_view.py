@@ -1,5 +1,5 @@
 from PyQt5 import QtWidgets
-from app.data import store
+from app.data import change_bus, store
 from app.services.analysis_logic import create_analysis, add_analysis_note, reassign_analysis, add_load_case, change_status, ALLOWED_STATUSES
 from app.services.auth import get_current_user
 from app.services.notifications import send_email
@@ -8,9 +8,14 @@ from app.utils.paths import get_project_root
 
 
 class AnalysesView(QtWidgets.QWidget):
+    # Tables (and change-bus channels) shown; refresh_if_changed() watches them
+    SOURCES = ("analyses.csv",)
+
     def __init__(self, project: str):
         super().__init__()
         self._project = project
+        self._seen_versions = None
+        self._data = None
         self._setup_ui()
         self.refresh()
 
@@ -54,13 +59,38 @@ class AnalysesView(QtWidgets.QWidget):
         self.btn_status.clicked.connect(self.on_status)
         self.btn_loadcase.clicked.connect(self.on_load_case)
         self.btn_export.clicked.connect(self.on_export)
-        self.filter_part.textChanged.connect(self.refresh)
-        self.filter_status.textChanged.connect(self.refresh)
-        self.filter_analyst.textChanged.connect(self.refresh)
+        self.filter_part.textChanged.connect(self._render)
+        self.filter_status.textChanged.connect(self._render)
+        self.filter_analyst.textChanged.connect(self._render)
+
+    @classmethod
+    def load(cls, project: str) -> dict:
+        """Everything the table shows; reads the store, so callable from a worker thread."""
+        versions = change_bus.versions(project, cls.SOURCES)
+        rows = [r for r in store.read_all(project, "analyses.csv") if r.get("project") == project]
+        return {"project": project, "versions": versions, "rows": rows}
+
+    def refresh_if_changed(self, data: dict | None = None):
+        """Refresh if a shown table changed, from ``data`` (see load()) when it was loaded in the background."""
+        if change_bus.versions(self._project, self.SOURCES) == self._seen_versions:
+            return
+        if data is not None and data["project"] == self._project:
+            self.show_data(data)
+        else:
+            self.refresh()
 
     def refresh(self):
-        store.seed_tables(self._project)
-        rows = [r for r in store.read_all(self._project, "analyses.csv") if r.get("project") == self._project]
+        self.show_data(self.load(self._project))
+
+    def show_data(self, data: dict):
+        self._seen_versions = data["versions"]
+        self._data = data
+        self._render()
+
+    def _render(self):
+        if self._data is None:
+            return
+        rows = self._data["rows"]
         f_part = (self.filter_part.text() or "").lower().strip()
         f_status = (self.filter_status.text() or "").lower().strip()
         f_analyst = (self.filter_analyst.text() or "").lower().strip()
@@ -118,8 +148,12 @@ class AnalysesView(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "Notes required", "Please enter notes.")
             return
         user = get_current_user(self._project)
-        create_analysis(self._project, analysis_id.text().strip(), part.text().strip(), int(rev.value()), user.username, user.username, tags.text().strip())
-        add_analysis_note(self._project, analysis_id.text().strip(), "created", user.username, notes.toPlainText().strip())
+        try:
+            create_analysis(self._project, analysis_id.text().strip(), part.text().strip(), int(rev.value()), user.username, user.username, tags.text().strip())
+            add_analysis_note(self._project, analysis_id.text().strip(), "created", user.username, notes.toPlainText().strip())
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         self.refresh()
 
     def on_reassign(self):
@@ -144,7 +178,11 @@ class AnalysesView(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "Missing", "Provide new analyst and notes.")
             return
         user = get_current_user(self._project)
-        reassign_analysis(self._project, analysis_id, new_analyst.text().strip(), user.username, notes.toPlainText().strip())
+        try:
+            reassign_analysis(self._project, analysis_id, new_analyst.text().strip(), user.username, notes.toPlainText().strip())
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         self.refresh()
 
     def on_load_case(self):
@@ -171,7 +209,11 @@ class AnalysesView(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "Missing", "Provide load case ID and notes.")
             return
         user = get_current_user(self._project)
-        add_load_case(self._project, analysis_id, lc_id.text().strip(), name.text().strip(), user.username, notes.toPlainText().strip())
+        try:
+            add_load_case(self._project, analysis_id, lc_id.text().strip(), name.text().strip(), user.username, notes.toPlainText().strip())
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         self.refresh()
 
     def on_status(self):
@@ -199,7 +241,11 @@ class AnalysesView(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "Required", "Presentation number is required for 'presented'.")
             return
         user = get_current_user(self._project)
-        ok = change_status(self._project, analysis_id, new_status, user.username, comment.toPlainText().strip(), presentation_number=pres.text().strip())
+        try:
+            ok = change_status(self._project, analysis_id, new_status, user.username, comment.toPlainText().strip(), presentation_number=pres.text().strip())
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         if not ok:
             QtWidgets.QMessageBox.warning(self, "Failed", "Status change failed.")
             return
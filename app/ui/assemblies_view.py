@@ -2,8 +2,7 @@ from PyQt5 import QtWidgets, QtCore
 from app.data import store
 from app.assembly.contact_detection import compute_contacts_occ
 from app.assembly.viewer import AssemblyViewer
-from app.assembly.mesh_utils import shape_to_mesh
-from app.assembly.step_loader import load_shape_for_member
+from app.ui.shape_loader import ShapeLoader
 
 
 class AssembliesView(QtWidgets.QWidget):
@@ -14,6 +13,12 @@ class AssembliesView(QtWidgets.QWidget):
         self._dock_widget: QtWidgets.QDockWidget | None = None
         self._applied_initial_dock_size = False
         self._viewer_content_source: str = ""  # '', 'assembly', or 'preview'
+        # Shapes load in the background; _load_kind says what the current load is for
+        self._load_kind: str = ""
+        self._loader = ShapeLoader(parent=self)
+        self._loader.loaded.connect(self._on_shape_loaded, QtCore.Qt.QueuedConnection)
+        self._loader.progress.connect(self._on_load_progress, QtCore.Qt.QueuedConnection)
+        self._loader.finished.connect(self._on_load_finished, QtCore.Qt.QueuedConnection)
         self._setup_ui()
         # Create viewer dock in a sensible default position/size
         if self._main_window is not None:
@@ -44,6 +49,8 @@ class AssembliesView(QtWidgets.QWidget):
         actions.addWidget(self.btn_add_member)
         actions.addWidget(self.btn_contacts_occ)
         actions.addWidget(self.clearance_spin)
+        self.load_status = QtWidgets.QLabel("")
+        actions.addWidget(self.load_status)
 
         self.assemblies = QtWidgets.QComboBox()
         self.members = QtWidgets.QTableWidget()
@@ -196,33 +203,20 @@ class AssembliesView(QtWidgets.QWidget):
         self.viewer.clear()
         self._viewer_content_source = ""
         if not aid:
+            self._loader.cancel()
+            self._load_kind = ""
+            self.load_status.setText("")
             self.members.setRowCount(0)
             self.contacts.setRowCount(0)
             return
         m = [r for r in store.read_all(self._project, "assembly_members.csv") if r.get("project") == self._project and r.get("assembly_id") == aid and (r.get("included","true") or "").lower()=="true"]
         self.members.setRowCount(len(m))
-        loaded_count = 0
         for i, r in enumerate(m):
             vals = [r.get("part_base",""), r.get("rev_index",""), r.get("included","true")]
             for c, v in enumerate(vals):
                 self.members.setItem(i, c, QtWidgets.QTableWidgetItem(v))
-            # Load shape and show in viewer
-            try:
-                part = r.get("part_base","")
-                rev = int(r.get("rev_index","0") or 0)
-                shape = load_shape_for_member(self._project, part, rev)
-                mode = getattr(self.viewer, '_mode', '')
-                if mode == 'occt' and shape is not None:
-                    self.viewer.add_occ_shape(f"{part}_{rev}", shape); loaded_count += 1
-                else:
-                    verts, faces = shape_to_mesh(shape)
-                    if getattr(verts, 'size', 0) and getattr(faces, 'size', 0):
-                        self.viewer.add_mesh(f"{part}_{rev}", verts, faces); loaded_count += 1
-            except Exception:
-                pass
-        # Mark as assembly content only if at least one member shape was drawn
-        if loaded_count > 0:
-            self._viewer_content_source = "assembly"
+        # Shapes are loaded in the background and drawn as each one arrives
+        self._start_loading("assembly", [(r.get("part_base",""), int(r.get("rev_index","0") or 0)) for r in m])
         # Load last contacts if any
         cts = [c for c in store.read_all(self._project, "contacts.csv") if c.get("project") == self._project and c.get("assembly_id") == aid]
         self.contacts.setRowCount(len(cts))
@@ -231,7 +225,39 @@ class AssembliesView(QtWidgets.QWidget):
             for j, v in enumerate(vals):
                 self.contacts.setItem(i, j, QtWidgets.QTableWidgetItem(v))
 
+    def _start_loading(self, kind: str, members: list[tuple[str, int]]):
+        self._load_kind = kind
+        self._loader.start(self._project, members, as_mesh=getattr(self.viewer, '_mode', '') != 'occt')
+
+    def _on_shape_loaded(self, generation: int, name: str, payload):
+        if generation != self._loader.generation:
+            return
+        try:
+            if getattr(self.viewer, '_mode', '') == 'occt':
+                self.viewer.add_occ_shape(name, payload)
+            else:
+                vertices, faces, lods = payload
+                self.viewer.add_mesh(name, vertices, faces, lods=lods)
+        except Exception:
+            return
+        # Mark as assembly content once a member shape was drawn
+        self._viewer_content_source = self._load_kind
+
+    def _on_load_progress(self, generation: int, done: int, total: int):
+        if generation == self._loader.generation:
+            self.load_status.setText(f"Loading shapes {done}/{total}...")
+
+    def _on_load_finished(self, generation: int, shown: int):
+        if generation == self._loader.generation:
+            self.load_status.setText("")
+
+    def stop_loading(self):
+        """Cancel pending shape loads and release the worker threads."""
+        self._loader.close()
+
     def is_showing_assembly(self) -> bool:
+        if self._load_kind == 'assembly' and self._loader.is_loading():
+            return True
         return getattr(self, '_viewer_content_source', '') == 'assembly'
 
     def show_parts_preview(self, parts_with_revs: list[tuple[str, int]]):
@@ -255,33 +281,26 @@ class AssembliesView(QtWidgets.QWidget):
                 return
         # Otherwise, clear and show selected parts as ad-hoc preview
         self.viewer.clear()
-        for part, rev in parts_with_revs:
-            try:
-                shape = load_shape_for_member(self._project, part, int(rev))
-                mode = getattr(self.viewer, '_mode', '')
-                if mode == 'occt' and shape is not None:
-                    self.viewer.add_occ_shape(f"{part}_{rev}", shape)
-                else:
-                    verts, faces = shape_to_mesh(shape)
-                    if getattr(verts, 'size', 0) and getattr(faces, 'size', 0):
-                        self.viewer.add_mesh(f"{part}_{rev}", verts, faces)
-            except Exception:
-                continue
-        self._viewer_content_source = "preview"
+        self._viewer_content_source = ""
+        self._start_loading("preview", [(part, int(rev)) for part, rev in parts_with_revs])
 
     def on_new(self):
         aid, ok = QtWidgets.QInputDialog.getText(self, "New Assembly", "Assembly ID:")
         if not ok or not aid.strip():
             return
         from time import strftime
-        store.append_row(self._project, "assemblies.csv", {
-            "project": self._project,
-            "assembly_id": aid.strip(),
-            "name": aid.strip(),
-            "created_by": "",
-            "created_at": strftime("%Y-%m-%d %H:%M:%S"),
-            "note": "",
-        })
+        try:
+            store.append_row(self._project, "assemblies.csv", {
+                "project": self._project,
+                "assembly_id": aid.strip(),
+                "name": aid.strip(),
+                "created_by": "",
+                "created_at": strftime("%Y-%m-%d %H:%M:%S"),
+                "note": "",
+            })
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         self.refresh()
 
     def on_add_member(self):
@@ -301,13 +320,17 @@ class AssembliesView(QtWidgets.QWidget):
         btns.rejected.connect(dlg.reject)
         if dlg.exec_() != QtWidgets.QDialog.Accepted:
             return
-        store.append_row(self._project, "assembly_members.csv", {
-            "project": self._project,
-            "assembly_id": aid,
-            "part_base": part.text().strip(),
-            "rev_index": int(rev.value()),
-            "included": "true",
-        })
+        try:
+            store.append_row(self._project, "assembly_members.csv", {
+                "project": self._project,
+                "assembly_id": aid,
+                "part_base": part.text().strip(),
+                "rev_index": int(rev.value()),
+                "included": "true",
+            })
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         self.refresh_members()
 
     def _gather_members(self):
@@ -325,9 +348,13 @@ class AssembliesView(QtWidgets.QWidget):
         if not aid or not members:
             return
         contacts = compute_contacts_occ(self._project, aid, members, clearance_max_mm=self.clearance_spin.value())
-        allc = [c for c in store.read_all(self._project, "contacts.csv") if not (c.get("project") == self._project and c.get("assembly_id") == aid)]
-        allc.extend(contacts)
-        store.write_rows(self._project, "contacts.csv", allc)
+        def replace_contacts(rows):
+            return [c for c in rows if not (c.get("project") == self._project and c.get("assembly_id") == aid)] + contacts
+        try:
+            store.modify_rows(self._project, "contacts.csv", replace_contacts)
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         self.refresh_members()
 
     def on_contact_selected(self):
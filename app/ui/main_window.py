@@ -1,13 +1,22 @@
 from PyQt5 import QtWidgets, QtCore
-from app.config.settings import load_admin_settings, load_projects_registry
-from app.utils.paths import ensure_project_skeleton
-from app.data import store
+from app.config.settings import load_admin_settings, load_projects_registry, reload_projects
+from app.utils.paths import ensure_project_skeleton, project_database_dir
+from app.data import change_bus, store
 from app.ui.parts_view import PartsView
 from app.ui.analyses_view import AnalysesView
 from app.ui.admin_view import AdminView
 from app.ui.assemblies_view import AssembliesView
 from app.services.watcher import ProjectWatcher
 from app.ui.styles import app_stylesheet
+from app.ui.qt_bridge import ChangeBridge
+
+
+_REFRESHED_VIEWS = (PartsView, AnalysesView)
+
+
+def _preload_tables(project: str, names) -> dict:
+    # Runs on the bridge's worker: the views' rows, so refresh_views() only fills tables
+    return {view: view.load(project) for view in _REFRESHED_VIEWS if set(view.SOURCES) & set(names)}
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -73,14 +82,23 @@ class MainWindow(QtWidgets.QMainWindow):
         ensure_project_skeleton(self.current_project)
         store.seed_tables(self.current_project)
 
-        # Auto-refresh timer (avoid refreshing Assemblies to keep camera stable)
+        # Change-driven refresh: writes made here and file notifications for
+        # Database/ and CAD/ bump table versions on the change bus; views
+        # only rebuild when a table they show changed. Bumps arrive on
+        # watcher threads and reach the widgets only through the bridge. The
+        # slow timer covers notifications lost on network shares.
+        self._changes = ChangeBridge(_preload_tables, parent=self)
+        self._changes.changed.connect(self._on_tables_changed)
+        self._unsubscribe_changes = change_bus.subscribe(self._changes.post)
         self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.refresh_views)
-        self.timer.start(max(1000, int(self.settings.refresh_seconds) * 1000))
+        self.timer.timeout.connect(self._poll_database)
+        self.timer.start(max(5, int(self.settings.poll_seconds)) * 1000)
 
-        # File watcher
-        self.watcher = ProjectWatcher(self.current_project, on_change=self.refresh_views)
+        # File watchers
+        self.watcher = ProjectWatcher(self.current_project)
         self.watcher.start()
+        self.db_watcher = change_bus.DatabaseWatcher(self.current_project, project_database_dir(self.current_project), store.CSV_HEADERS)
+        self.db_watcher.start()
         # Restore main window geometry (do not restore dock layout)
         self._restore_window_state()
         # Ensure maximized at first show if nothing to restore
@@ -93,10 +111,19 @@ class MainWindow(QtWidgets.QMainWindow):
     def current_project(self) -> str:
         return self.project_combo.currentText() or self.settings.default_project
 
-    def refresh_views(self):
-        # Refresh parts and analyses frequently; leave assemblies view untouched to avoid recentering
-        self.parts_view.refresh()
-        self.analyses_view.refresh()
+    def refresh_views(self, loaded: dict | None = None):
+        # Refresh parts and analyses if their tables changed; leave assemblies view untouched to avoid recentering
+        loaded = loaded or {}
+        self.parts_view.refresh_if_changed(loaded.get(PartsView))
+        self.analyses_view.refresh_if_changed(loaded.get(AnalysesView))
+
+    def _on_tables_changed(self, project: str, names, loaded) -> None:
+        if project == self.current_project:
+            self.refresh_views(loaded)
+
+    def _poll_database(self) -> None:
+        # Stats files on the share, so keep it off the GUI thread
+        self._changes.submit(self.db_watcher.poll)
 
     def on_project_changed(self, code: str):
         ensure_project_skeleton(code)
@@ -104,13 +131,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.parts_view.set_project(code)
         self.analyses_view.set_project(code)
         self.assemblies_view.set_project(code)
-        # Restart watcher for new project
+        # Restart watchers for new project
         try:
             self.watcher.stop()
+            self.db_watcher.stop()
         except Exception:
             pass
-        self.watcher = ProjectWatcher(self.current_project, on_change=self.refresh_views)
+        self.watcher = ProjectWatcher(self.current_project)
         self.watcher.start()
+        self.db_watcher = change_bus.DatabaseWatcher(self.current_project, project_database_dir(self.current_project), store.CSV_HEADERS)
+        self.db_watcher.start()
         self.statusBar().showMessage(f"Project switched to {code}")
 
     def _settings(self) -> QtCore.QSettings:
@@ -149,6 +179,14 @@ class MainWindow(QtWidgets.QMainWindow):
             s.setValue("mainWindow/geometry", self.saveGeometry())
         except Exception:
             pass
+        self._unsubscribe_changes()
+        self._changes.close()
+        self.assemblies_view.stop_loading()
+        try:
+            self.watcher.stop()
+            self.db_watcher.stop()
+        except Exception:
+            pass
         super().closeEvent(event)
 
     def _on_tab_changed(self, index: int) -> None:
@@ -238,7 +276,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def reload_projects(self, select_code: str | None = None) -> None:
         """Reload the projects registry and repopulate the combobox immediately."""
         current = self.project_combo.currentText()
-        self.projects = load_projects_registry()
+        self.projects = reload_projects()
         block_prev = self.project_combo.blockSignals(True)
         self.project_combo.clear()
         for code, p in self.projects.items():
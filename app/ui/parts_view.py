@@ -1,15 +1,49 @@
-from PyQt5 import QtWidgets
-from app.data import store
-from app.services import revision_logic
+import threading
+from typing import Any, Callable
+
+from PyQt5 import QtCore, QtWidgets
+from app.data import change_bus, store
+from app.services import artifact_cache, revision_logic
 from app.services.auth import get_current_user
-from app.utils.paths import revision_ppt_path
-import os
+
+
+class _IngestJob(QtCore.QObject):
+    """Runs ``work(progress, cancel)`` on a worker thread.
+
+    ``done`` carries its result, or the exception that stopped it. Setting
+    ``cancel`` asks ``work`` to stop (see revision_logic.bulk_ingest).
+    """
+
+    progress = QtCore.pyqtSignal(int, int)
+    done = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, work: Callable[[Callable[[int, int], None], threading.Event], Any], parent=None):
+        super().__init__(parent)
+        self.cancel = threading.Event()
+        self._work = work
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="ingest", daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            result = self._work(self.progress.emit, self.cancel)
+        except Exception as e:
+            self.done.emit(None, e)
+            return
+        self.done.emit(result, None)
 
 
 class PartsView(QtWidgets.QWidget):
+    # Tables (and change-bus channels) shown; refresh_if_changed() watches them
+    SOURCES = ("parts.csv", "revisions.csv", change_bus.ARTIFACTS)
+
     def __init__(self, project: str):
         super().__init__()
         self._project = project
+        self._seen_versions = None
+        self._data = None
+        self._ingest_job = None
         self._setup_ui()
         self.refresh()
 
@@ -28,9 +62,11 @@ class PartsView(QtWidgets.QWidget):
 
         actions_layout = QtWidgets.QHBoxLayout()
         self.btn_ingest = QtWidgets.QPushButton("Ingest STEP as New Revision")
+        self.btn_bulk_ingest = QtWidgets.QPushButton("Bulk Ingest Folder")
         self.btn_activate = QtWidgets.QPushButton("Activate Selected Revision (Owner Only)")
         self.btn_add_notes = QtWidgets.QPushButton("Add Notes & PPT Path")
         actions_layout.addWidget(self.btn_ingest)
+        actions_layout.addWidget(self.btn_bulk_ingest)
         actions_layout.addWidget(self.btn_add_notes)
         actions_layout.addWidget(self.btn_activate)
 
@@ -44,39 +80,56 @@ class PartsView(QtWidgets.QWidget):
         layout.addWidget(self.table)
 
         self.btn_ingest.clicked.connect(self.on_ingest)
+        self.btn_bulk_ingest.clicked.connect(self.on_bulk_ingest)
         self.btn_add_notes.clicked.connect(self.on_add_notes)
         self.btn_activate.clicked.connect(self.on_activate)
-        self.filter_part.textChanged.connect(self.refresh)
-        self.filter_owner.textChanged.connect(self.refresh)
-
-    def refresh(self):
-        store.seed_tables(self._project)
-        all_parts = store.read_all(self._project, "parts.csv")
-        all_revs = store.read_all(self._project, "revisions.csv")
-
-        parts = [p for p in all_parts if p.get("project") == self._project and (p.get("part_base") or "").strip()]
-        revs = [r for r in all_revs if r.get("project") == self._project and (r.get("part_base") or "").strip()]
-
-        latest_rev_by_part = {}
-        pending_by_part = {}
-        for r in revs:
-            part = (r.get("part_base") or "").strip()
-            try:
-                rev = int(r.get("rev_index", "0") or 0)
-            except ValueError:
-                rev = 0
-            if not part:
-                continue
-            latest_rev_by_part[part] = max(latest_rev_by_part.get(part, 0), rev)
-            if (r.get("pending_activation", "false") or "").lower() == "true":
-                pending_by_part[part] = True
+        self.filter_part.textChanged.connect(self._render)
+        self.filter_owner.textChanged.connect(self._render)
 
+    @classmethod
+    def load(cls, project: str) -> dict:
+        """Everything the table shows; reads the store, so callable from a worker thread."""
+        versions = change_bus.versions(project, cls.SOURCES)
+        all_parts = store.read_all(project, "parts.csv")
+        summary = store.part_summary(project)
+        latest_rev_by_part = dict(zip(summary.parts, summary.latest_rev.tolist()))
         ppt_by_part = {}
         for part, rev in latest_rev_by_part.items():
-            if rev > 0:
-                ppt_by_part[part] = os.path.exists(revision_ppt_path(self._project, part, rev))
-            else:
-                ppt_by_part[part] = False
+            ppt_by_part[part] = artifact_cache.has_revision_ppt(project, part, rev) if rev > 0 else False
+        return {
+            "project": project,
+            "versions": versions,
+            "parts": [p for p in all_parts if p.get("project") == project and (p.get("part_base") or "").strip()],
+            "latest_rev": latest_rev_by_part,
+            "pending": dict(zip(summary.parts, summary.pending.tolist())),
+            "ppt": ppt_by_part,
+        }
+
+    def refresh_if_changed(self, data: dict | None = None):
+        """Refresh if a shown table changed, from ``data`` (see load()) when it was loaded in the background."""
+        if change_bus.versions(self._project, self.SOURCES) == self._seen_versions:
+            return
+        if data is not None and data["project"] == self._project:
+            self.show_data(data)
+        else:
+            self.refresh()
+
+    def refresh(self):
+        self.show_data(self.load(self._project))
+
+    def show_data(self, data: dict):
+        self._seen_versions = data["versions"]
+        self._data = data
+        self._render()
+
+    def _render(self):
+        if self._data is None:
+            return
+        data = self._data
+        parts = data["parts"]
+        latest_rev_by_part = data["latest_rev"]
+        pending_by_part = data["pending"]
+        ppt_by_part = data["ppt"]
 
         # Apply filters
         f_part = (self.filter_part.text() or "").lower().strip()
@@ -107,6 +160,8 @@ class PartsView(QtWidgets.QWidget):
             row_idx += 1
 
     def on_ingest(self):
+        if self._ingest_job is not None:
+            return
         path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select STEP file", filter="STEP Files (*.step *.stp)")
         if not path:
             return
@@ -115,24 +170,66 @@ class PartsView(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "Invalid filename", "Filename must end with _NNN, e.g., PART_012.step")
             return
         part_base, rev_index = parsed
-        user = get_current_user(self._project)
-        revision_logic.ensure_revision_row(self._project, part_base, rev_index, path, user.username)
-        parts = store.read_all(self._project, "parts.csv")
-        if not any(p.get("part_base") == part_base for p in parts):
-            from time import strftime
-            store.append_row(self._project, "parts.csv", {
-                "project": self._project,
-                "part_base": part_base,
-                "title": part_base,
-                "owner_username": user.username,
-                "manager_override_username": "",
-                "active_rev": "",
-                "notes": "",
-                "created_at": strftime("%Y-%m-%d %H:%M:%S"),
-                "updated_at": strftime("%Y-%m-%d %H:%M:%S"),
-            })
+        project = self._project
+        user = get_current_user(project)
+
+        def work(progress, cancel):
+            # Hashing and copying a large STEP to the share takes a while
+            revision_logic.ensure_revision_row(project, part_base, rev_index, path, user.username, cancel=cancel)
+            revision_logic.ensure_parts(project, [part_base], user.username)
+
+        self._start_ingest("Storing STEP file...", work, lambda result: None)
+
+    def on_bulk_ingest(self):
+        if self._ingest_job is not None:
+            return
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Select folder with STEP files")
+        if not folder:
+            return
+        project = self._project
+        user = get_current_user(project)
+        self._start_ingest("Hashing STEP files...", lambda progress, cancel: revision_logic.bulk_ingest(project, folder, user.username, progress=progress, cancel=cancel), self._show_bulk_ingest_result)
+
+    def _start_ingest(self, label: str, work, on_done):
+        dialog = QtWidgets.QProgressDialog(label, "Cancel", 0, 0, self)
+        dialog.setWindowModality(QtCore.Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        job = _IngestJob(work, self)
+        dialog.canceled.connect(job.cancel.set)
+        job.progress.connect(lambda done, total: (dialog.setMaximum(total), dialog.setValue(done)))
+        job.done.connect(lambda result, error: self._on_ingest_done(dialog, on_done, result, error))
+        self._ingest_job = job
+        job.start()
+
+    def _on_ingest_done(self, dialog, on_done, result, error):
+        self._ingest_job = None
+        dialog.close()
+        if isinstance(error, InterruptedError):
+            # Cancelled before anything was written
+            return
+        if isinstance(error, store.LockTimeout):
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{error}\nPlease try again.")
+            return
+        if error is not None:
+            QtWidgets.QMessageBox.warning(self, "Ingest failed", str(error))
+            return
+        on_done(result)
         self.refresh()
 
+    def _show_bulk_ingest_result(self, result):
+        if result.cancelled:
+            QtWidgets.QMessageBox.information(self, "Bulk ingest", "Cancelled; nothing was added.")
+            return
+        lines = [f"Added {result.added} revision(s); {result.already_present} already present."]
+        if result.duplicates:
+            lines.append(f"{len(result.duplicates)} file(s) skipped, another file has the same part and revision.")
+        if result.unparsed:
+            lines.append(f"{len(result.unparsed)} file(s) skipped, name must end with _NNN.")
+        if result.errors:
+            lines.append(f"{len(result.errors)} file(s) could not be read:")
+            lines.extend(f"  {path}: {msg}" for path, msg in result.errors[:10])
+        QtWidgets.QMessageBox.information(self, "Bulk ingest", "\n".join(lines))
+
     def on_add_notes(self):
         row = self.table.currentRow()
         if row < 0:
@@ -155,7 +252,11 @@ class PartsView(QtWidgets.QWidget):
         if not ppt_path:
             return
         user = get_current_user(self._project)
-        revision_logic.append_revision_note(self._project, part, rev_text, user.username, what, why, impacts, ppt_path)
+        try:
+            revision_logic.append_revision_note(self._project, part, rev_text, user.username, what, why, impacts, ppt_path)
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         self.refresh()
 
     def on_activate(self):
@@ -164,12 +265,8 @@ class PartsView(QtWidgets.QWidget):
             QtWidgets.QMessageBox.information(self, "Select", "Select a part row first.")
             return
         part = self.table.item(row, 0).text()
-        parts = store.read_all(self._project, "parts.csv")
-        owner = None
-        for p in parts:
-            if p.get("part_base") == part:
-                owner = p.get("owner_username")
-                break
+        matches = store.find_by(self._project, "parts.csv", part_base=part)
+        owner = matches[0].get("owner_username") if matches else None
         user = get_current_user(self._project)
         if owner and owner.lower() != user.username.lower():
             QtWidgets.QMessageBox.warning(self, "Permission", "Only the part owner can activate a revision.")
@@ -180,7 +277,11 @@ class PartsView(QtWidgets.QWidget):
         if not revision_logic.has_required_artifacts(self._project, part, rev_index):
             QtWidgets.QMessageBox.warning(self, "Missing artifacts", "Notes and PPT are required before activation.")
             return
-        ok2 = revision_logic.activate_revision(self._project, part, rev_index, user.username)
+        try:
+            ok2 = revision_logic.activate_revision(self._project, part, rev_index, user.username)
+        except store.LockTimeout as e:
+            QtWidgets.QMessageBox.warning(self, "Busy", f"{e}\nPlease try again.")
+            return
         if not ok2:
             QtWidgets.QMessageBox.warning(self, "Activation failed", "Could not activate revision.")
             return
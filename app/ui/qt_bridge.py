@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Set
+
+from PyQt5 import QtCore
+
+# Views are refreshed at most this often, however fast changes arrive
+MIN_INTERVAL_MS = 250
+
+_log = logging.getLogger("app.qt_bridge")
+
+
+class ChangeBridge(QtCore.QObject):
+    """Carries change notifications from any thread to the GUI thread.
+
+    post() is safe to call from watcher and worker threads; it only records
+    the changed names and wakes the GUI thread through a queued signal (at
+    most one in flight). Notifications are rate limited rather than
+    debounced, so a steady stream of changes still refreshes the views every
+    ``min_interval_ms``. Before ``changed`` is emitted, ``preload(project,
+    names)`` runs on a background worker; what it returns is passed along
+    with the signal, so the views get their rows without reading files on
+    the GUI thread.
+    """
+
+    changed = QtCore.pyqtSignal(str, object, object)
+    _wake = QtCore.pyqtSignal()
+    _loaded = QtCore.pyqtSignal(object)
+
+    def __init__(self, preload: Callable[[str, Set[str]], Any] | None = None, min_interval_ms: int = MIN_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.preload = preload
+        self.min_interval_ms = min_interval_ms
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Set[str]] = {}
+        self._woken = False
+        self._busy = False
+        self._closed = False
+        self._last_flush = 0.0
+        self._stats = {"posted": 0, "flushed": 0}
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ui-worker")
+        self._wake.connect(self._on_wake, QtCore.Qt.QueuedConnection)
+        self._loaded.connect(self._on_loaded, QtCore.Qt.QueuedConnection)
+
+    def post(self, project: str, names: Iterable[str]) -> None:
+        """Record changed tables of ``project``; callable from any thread."""
+        with self._lock:
+            self._pending.setdefault(project, set()).update(names)
+            self._stats["posted"] += 1
+            if self._woken or self._closed:
+                return
+            self._woken = True
+        self._wake.emit()
+
+    def submit(self, fn: Callable[[], None]) -> None:
+        """Run ``fn`` on the background worker (after any preload in progress)."""
+        if not self._closed:
+            self._executor.submit(self._guarded, fn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._timer.stop()
+        self._executor.shutdown(wait=False)
+
+    def _on_wake(self) -> None:
+        with self._lock:
+            self._woken = False
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._busy or self._timer.isActive() or self._closed:
+            return
+        wait_ms = (self._last_flush - time.monotonic()) * 1000 + self.min_interval_ms
+        self._timer.start(max(0, int(wait_ms)))
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._stats["flushed"] += 1
+        if not pending:
+            return
+        self._last_flush = time.monotonic()
+        self._busy = True
+        self._executor.submit(self._preload, pending)
+
+    def _preload(self, pending: Dict[str, Set[str]]) -> None:
+        # Worker thread
+        results = {}
+        for project, names in pending.items():
+            if self.preload is not None:
+                results[project] = self._guarded(lambda: self.preload(project, names))
+        if not self._closed:
+            self._loaded.emit((pending, results))
+
+    def _on_loaded(self, loaded) -> None:
+        pending, results = loaded
+        self._busy = False
+        for project, names in pending.items():
+            self.changed.emit(project, frozenset(names), results.get(project))
+        with self._lock:
+            more = bool(self._pending)
+        if more:
+            self._schedule()
+
+    @staticmethod
+    def _guarded(fn: Callable[[], Any]) -> Any:
+        try:
+            return fn()
+        except Exception:
+            _log.exception("Background UI task failed")
+            return None
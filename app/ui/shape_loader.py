@@ -0,0 +1,109 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Tuple
+
+from PyQt5 import QtCore
+
+from app.assembly.mesh_cache import load_member_mesh
+from app.assembly.mesh_utils import mesh_lods
+from app.assembly.step_loader import TRANSLATE_PROCESSES, load_shape_for_member, member_load_cost, shutdown_translators
+
+# Shapes loaded at the same time. STEP translation itself runs in child
+# processes, so one thread per translation process keeps them all busy.
+LOAD_WORKERS = TRANSLATE_PROCESSES
+
+_log = logging.getLogger("app.shape_loader")
+
+
+class ShapeLoader(QtCore.QObject):
+    """Loads member shapes on worker threads and hands them to the GUI one by one.
+
+    start() begins a new load and cancels the previous one; every signal
+    carries the generation number start() returned so that late results of
+    a cancelled load can be ignored. ``loaded`` passes a shape, or
+    ``(vertices, faces, lods)`` when meshes were requested, ``lods`` being
+    the coarser levels of detail from mesh_lods(). The signals are
+    emitted from worker threads and arrive queued on the GUI thread.
+    """
+
+    loaded = QtCore.pyqtSignal(int, str, object)
+    progress = QtCore.pyqtSignal(int, int, int)
+    finished = QtCore.pyqtSignal(int, int)
+
+    def __init__(self, workers: int = LOAD_WORKERS, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shape-loader")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures: List[Future] = []
+        self._done = 0
+        self._shown = 0
+        self._total = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def is_loading(self) -> bool:
+        with self._lock:
+            return self._done < self._total
+
+    def start(self, project: str, members: List[Tuple[str, int]], as_mesh: bool) -> int:
+        """Load ``(part_base, rev_index)`` members; returns the new generation.
+
+        Shapes already in memory come first, then the smallest files, so a
+        first picture appears quickly while the large parts translate.
+        """
+        members = sorted(members, key=lambda m: member_load_cost(project, m[0], m[1]))
+        with self._lock:
+            self._cancel_locked()
+            generation = self._generation
+            self._done = self._shown = 0
+            self._total = len(members)
+            self._futures = [self._executor.submit(self._load, generation, project, part, rev, as_mesh) for part, rev in members]
+        if not members:
+            self.finished.emit(generation, 0)
+        return generation
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancel_locked()
+
+    def close(self) -> None:
+        self.cancel()
+        self._executor.shutdown(wait=False)
+        shutdown_translators()
+
+    def _cancel_locked(self) -> None:
+        self._generation += 1
+        for f in self._futures:
+            f.cancel()
+        self._futures = []
+        self._total = self._done = 0
+
+    def _load(self, generation: int, project: str, part: str, rev: int, as_mesh: bool) -> None:
+        payload = None
+        if generation == self._generation:
+            try:
+                if as_mesh:
+                    # From the tessellation cache when possible, without touching OCC
+                    mesh = load_member_mesh(project, part, rev, use_processes=True)
+                    if mesh is not None:
+                        # Decimated here so the GUI thread only uploads them
+                        payload = (*mesh, mesh_lods(*mesh))
+                else:
+                    payload = load_shape_for_member(project, part, rev, use_processes=True)
+            except Exception:
+                _log.exception("Loading %s rev %s failed", part, rev)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._done += 1
+            self._shown += payload is not None
+            done, total, shown = self._done, self._total, self._shown
+        if payload is not None:
+            self.loaded.emit(generation, f"{part}_{rev}", payload)
+        self.progress.emit(generation, done, total)
+        if done == total:
+            self.finished.emit(generation, shown)
@@ -1,9 +1,45 @@
 import os
-from app.config.settings import get_project_root
+from typing import Dict, Tuple
+from app.config.settings import get_project_root, registry_version
+
+REVISION_PPT_NAME = "Change_Presentation.pptx"
+
+# (project, subfolder) -> path, valid for one registry version
+_dir_cache: Dict[Tuple[str, str], str] = {}
+_dir_cache_version = -1
+
+
+def _project_dir(project_code: str, sub: str) -> str:
+    global _dir_cache_version
+    version = registry_version()
+    if version != _dir_cache_version:
+        _dir_cache.clear()
+        _dir_cache_version = version
+    path = _dir_cache.get((project_code, sub))
+    if path is None:
+        path = _dir_cache[(project_code, sub)] = os.path.join(get_project_root(project_code), sub)
+    return path
 
 
 def project_database_dir(project_code: str) -> str:
-    return os.path.join(get_project_root(project_code), "Database")
+    return _project_dir(project_code, "Database")
+
+
+def project_locks_dir(project_code: str) -> str:
+    return _project_dir(project_code, "Locks")
+
+
+def project_temp_dir(project_code: str) -> str:
+    return _project_dir(project_code, "Temp")
+
+
+def project_objects_dir(project_code: str) -> str:
+    return _project_dir(project_code, "Objects")
+
+
+def object_path(project_code: str, sha1: str, suffix: str = ".step") -> str:
+    """Location of a content-addressed file: ``Objects/<sha[:2]>/<sha><suffix>``."""
+    return os.path.join(project_objects_dir(project_code), sha1[:2], sha1 + suffix)
 
 
 def ensure_project_skeleton(project_code: str) -> None:
@@ -15,19 +51,22 @@ def ensure_project_skeleton(project_code: str) -> None:
         "Reports",
         "Locks",
         "Temp",
+        "Objects",
     ]:
         os.makedirs(os.path.join(root, sub), exist_ok=True)
 
 
+def cad_parts_dir(project_code: str) -> str:
+    return _project_dir(project_code, os.path.join("CAD", "Parts"))
+
+
 def cad_part_rev_dir(project_code: str, part_base: str, rev_index: int) -> str:
-    root = get_project_root(project_code)
-    return os.path.join(root, "CAD", "Parts", part_base, f"rev_{rev_index:03d}")
+    return os.path.join(cad_parts_dir(project_code), part_base, f"rev_{rev_index:03d}")
 
 
 def revision_ppt_path(project_code: str, part_base: str, rev_index: int) -> str:
-    return os.path.join(cad_part_rev_dir(project_code, part_base, rev_index), "Change_Presentation.pptx")
+    return os.path.join(cad_part_rev_dir(project_code, part_base, rev_index), REVISION_PPT_NAME)
 
 
 def analysis_folder(project_code: str, part_base: str, analysis_id: str) -> str:
-    root = get_project_root(project_code)
-    return os.path.join(root, "Analysis", part_base, analysis_id)
+    return os.path.join(_project_dir(project_code, "Analysis"), part_base, analysis_id)